@@ -1,8 +1,22 @@
 # cli.py (English)
 
 import argparse
+import functools
+import os
+import sys
+from typing import Optional, Sequence
 
-def build_cli_parser() -> argparse.ArgumentParser:
+# Builds every subcommand with its options; used when the requested one cannot be told from argv.
+_ALL_COMMANDS = "*"
+_SUBCOMMAND_HELP = {
+    "preview": "Shows the organization of the files without modifying them.",
+    "run": "Applies the organization.",
+    "undo": "Reverts the last successful batch.",
+    "merge": "Merges homonymous subfolders between directories.",
+    "validate-config": "Validates the config.json file.",
+}
+
+def _build_cli_parser_uncached(command: Optional[str]) -> argparse.ArgumentParser:
     """Builds and configures the command parser for File Organizer.
     
     Workflow: 
@@ -26,20 +40,27 @@ def build_cli_parser() -> argparse.ArgumentParser:
             --dry-run: force simulation.
             --confirm: do not ask interactive confirmation.
             --debug: debug output.
+            --workers: threads used to apply the plan (run only).
         - undo:
             --debug
         - merge:
             --name: subfolder that will be merged.
             --from / --into: source and destination directories respectively.
-            --dedupe, --dry-run, --confirm, --debug
+            --dedupe, --dry-run, --confirm, --debug, --workers
         - validate-config
 
+    Args:
+        command (Optional[str]): Subcommand that will be built with its options, None to list all of
+            them, or _ALL_COMMANDS to build every subcommand with its options.
+
     Returns:
         argparse.ArgumentParser: Parser configured with subcommands and options.
     
     Notes:
         - The parser sets "dest='command'" and "required=True" to ensure one subcommand is chosen.
         - The option "--version" shows the CLI version.
+        - Only the requested subcommand is built with its options; if there is none
+          (e.g. "--help"), all subcommands are registered without options so they are still listed.
     """
     
     parser = argparse.ArgumentParser(prog="fo", description="File Organizer CLI - Preview -> Run -> Undo, with merge and validate / config.")
@@ -47,43 +68,103 @@ def build_cli_parser() -> argparse.ArgumentParser:
     parser.add_argument("--history", help="Path to history.json (default: '/Users/yberside/Desktop/Programación/SQLite/File Organizer (Prueba)/history.json')")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
-    p_preview = subparsers.add_parser("preview", help="Shows the organization of the files without modifying them.")
-    p_preview.add_argument("--path", type=str, help="Destination path.")
-    p_preview.add_argument("--only-ext", type=str, help="Filter by file extensions. Comma separated: (.jpg, .pdf, etc.)")
-    p_preview.add_argument("--categories", type=str,help="List of categories. Comma separated: (media, docs, code, etc.)")
-    p_preview.add_argument("--by-date", choices=["created", "modified"], help="Split by date. (YYYY/MM)")
-    p_preview.add_argument("--size-min", type=str, help="Minimum size.")
-    p_preview.add_argument("--size-max", type=str, help="Maximum size.")
-    p_preview.add_argument("--move", action="store_true", help="Plan move.")
-    p_preview.add_argument("--copy", action="store_true", help="Plan copy.")
-    p_preview.add_argument("--skip-empties", action="store_true", help="Do not create empty folders.")
-    p_preview.add_argument("--dedupe", choices=["skip", "link", "delete"], default="skip", help="Duplicates policy.")
-    p_preview.add_argument("--collision", choices=["rename", "keep-newest", "skip"], default="rename", help="Policy for name collisions.")
-    p_preview.add_argument("--dry-run", action="store_true", help="Force simulation.")
-    p_preview.add_argument("--confirm", action="store_true", help="Do not ask interactive confirmation.")
-    p_preview.add_argument("--debug", action="store_true", help="Debug output.")
-
-    p_run = subparsers.add_parser("run", help="Applies the organization.")
-    p_run.add_argument("--path", type=str, help="Destination path.")
-    p_run.add_argument("--only-ext", type=str, help="Filter by file extensions. Comma separated: (.jpg, .pdf, etc.)")
-    p_run.add_argument("--categories", type=str,help="List of categories. Comma separated: (media, docs, code, etc.)")
-    p_run.add_argument("--by-date", choices=["created", "modified"], help="Split by date. (YYYY/MM)")
-    p_run.add_argument("--size-min", type=str, help="Minimum size.")
-    p_run.add_argument("--size-max", type=str, help="Maximum size.")
-    p_run.add_argument("--move", action="store_true", help="Move.")
-    p_run.add_argument("--copy", action="store_true", help="Copy.")
-    p_run.add_argument("--skip-empties", action="store_true", help="Do not create empty folders.")
-    p_run.add_argument("--dedupe", choices=["skip", "link", "delete"], default="skip", help="Duplicates policy.")
-    p_run.add_argument("--collision", choices=["rename", "keep-newest", "skip"], default="rename", help="Policy for name collisions.")
-    p_run.add_argument("--dry-run", action="store_true", help="Simulate without applying.")
-    p_run.add_argument("--confirm", action="store_true", help="Do not ask interactive confirmation.")
-    p_run.add_argument("--debug", action="store_true", help="Debug output.")
-
-    p_undo = subparsers.add_parser("undo", help="Reverts the last successful batch.")
+    if command == _ALL_COMMANDS:
+        for build in _SUBCOMMAND_BUILDERS.values():
+            build(subparsers)
+    elif command is not None:
+        _SUBCOMMAND_BUILDERS[command](subparsers)
+    else:
+        for name, help_text in _SUBCOMMAND_HELP.items():
+            subparsers.add_parser(name, help=help_text, add_help=False)
+
+    return parser
+
+_build_cli_parser_cached = functools.lru_cache(maxsize=len(_SUBCOMMAND_HELP) + 2)(_build_cli_parser_uncached)
+
+def build_cli_parser(argv: Optional[Sequence[str]] = None) -> argparse.ArgumentParser:
+    """Returns the parser for the subcommand requested in argv, reusing it between calls.
+
+    Args:
+        argv (Optional[Sequence[str]], optional): Arguments that will be parsed. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.ArgumentParser: Parser configured with subcommands and options.
+
+    Notes:
+        - `build_cli_parser.cache_clear()` discards the cached parsers (useful for tests).
+    """
+    return _build_cli_parser_cached(_sniff_subcommand(sys.argv[1:] if argv is None else argv))
+
+build_cli_parser.cache_clear = _build_cli_parser_cached.cache_clear
+
+_TOP_LEVEL_OPTIONS = ("--help", "--version", "--history")
+
+def _sniff_subcommand(argv: Sequence[str]) -> Optional[str]:
+    """Returns the subcommand requested in argv, None if there is none, or _ALL_COMMANDS if unsure.
+
+    Only the first positional token is considered; the value of "--history" (or of an
+    abbreviation argparse accepts, like "--hist") is skipped. When a token may or may not be
+    "--history" (e.g. the ambiguous "--h") _ALL_COMMANDS is returned, so the full parser is used.
+    """
+    skip_next = False
+    for tok in argv:
+        if skip_next:
+            skip_next = False
+            continue
+        if tok.startswith("--") and len(tok) > 2 and "=" not in tok:
+            matches = [opt for opt in _TOP_LEVEL_OPTIONS if opt.startswith(tok)]
+            if matches == ["--history"]:
+                skip_next = True
+                continue
+            if "--history" in matches:
+                return _ALL_COMMANDS
+        if tok.startswith("-"):
+            continue
+        return tok if tok in _SUBCOMMAND_HELP else None
+    return None
+
+def _add_common_plan_args(p: argparse.ArgumentParser) -> None:
+    """Adds the options shared by the preview and run subcommands."""
+    p.add_argument("--path", type=str, help="Destination path.")
+    p.add_argument("--only-ext", type=str, help="Filter by file extensions. Comma separated: (.jpg, .pdf, etc.)")
+    p.add_argument("--categories", type=str,help="List of categories. Comma separated: (media, docs, code, etc.)")
+    p.add_argument("--by-date", choices=["created", "modified"], help="Split by date. (YYYY/MM)")
+    p.add_argument("--size-min", type=str, help="Minimum size.")
+    p.add_argument("--size-max", type=str, help="Maximum size.")
+    p.add_argument("--move", action="store_true", help="Move.")
+    p.add_argument("--copy", action="store_true", help="Copy.")
+    p.add_argument("--skip-empties", action="store_true", help="Do not create empty folders.")
+    p.add_argument("--dedupe", choices=["skip", "link", "delete"], default="skip", help="Duplicates policy.")
+    p.add_argument("--collision", choices=["rename", "keep-newest", "skip"], default="rename", help="Policy for name collisions.")
+    p.add_argument("--dry-run", action="store_true", help="Simulate without applying.")
+    p.add_argument("--confirm", action="store_true", help="Do not ask interactive confirmation.")
+    p.add_argument("--debug", action="store_true", help="Debug output.")
+
+def default_workers() -> int:
+    """Default number of threads used to apply a plan: min(32, 4 * CPUs)."""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+def _add_apply_args(p: argparse.ArgumentParser) -> None:
+    """Options of the subcommands that apply a plan (run, merge)."""
+    p.add_argument("--workers", type=int, default=None, help="Threads used to apply the plan (default: min(32, 4 x CPUs)). 1 disables parallelism.")
+    p.add_argument("--strict-dedupe", action="store_true", help="Hash whole files for --dedupe skip (by default files of 16 MiB or more are compared by size and sampled blocks).")
+
+def _add_preview(subparsers) -> None:
+    p_preview = subparsers.add_parser("preview", help=_SUBCOMMAND_HELP["preview"])
+    _add_common_plan_args(p_preview)
+
+def _add_run(subparsers) -> None:
+    p_run = subparsers.add_parser("run", help=_SUBCOMMAND_HELP["run"])
+    _add_common_plan_args(p_run)
+    _add_apply_args(p_run)
+
+def _add_undo(subparsers) -> None:
+    p_undo = subparsers.add_parser("undo", help=_SUBCOMMAND_HELP["undo"])
     p_undo.add_argument("--debug", action="store_true", help="Debug output.")
     p_undo.add_argument("-y", "--yes", action="store_true", help="Automatically confirm the undo without asking.")
 
-    p_merge = subparsers.add_parser("merge", help="Merges homonymous subfolders between directories.")
+def _add_merge(subparsers) -> None:
+    p_merge = subparsers.add_parser("merge", help=_SUBCOMMAND_HELP["merge"])
     p_merge.add_argument("--src", required=True, help="Source directory to merge.")
     p_merge.add_argument("--dest", required=True, help="Final destination directory.")
     p_merge.add_argument("--only-ext", default=None, help="Filter by file extensions. Comma separated: (.jpg, .pdf, etc.)")
@@ -95,7 +176,15 @@ def build_cli_parser() -> argparse.ArgumentParser:
     p_merge.add_argument("--dedupe", choices=["skip", "link", "delete"], default="skip", help="Policy for duplicates by hash.")
     p_merge.add_argument("--debug", action="store_true", help="Debug output.")
     p_merge.add_argument("-y", "--yes", action="store_true", help="Automatically confirm execution (without asking).")
+    _add_apply_args(p_merge)
 
-    subparsers.add_parser("validate-config", help="Validates the config.json file.")
-    
-    return parser
+def _add_validate_config(subparsers) -> None:
+    subparsers.add_parser("validate-config", help=_SUBCOMMAND_HELP["validate-config"])
+
+_SUBCOMMAND_BUILDERS = {
+    "preview": _add_preview,
+    "run": _add_run,
+    "undo": _add_undo,
+    "merge": _add_merge,
+    "validate-config": _add_validate_config,
+}
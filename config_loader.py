@@ -6,6 +6,12 @@ from typing import Any, Dict, List
 
 import json
 import copy
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 DEFAULT_CONFIG: dict[str, Any] = {
@@ -21,18 +27,23 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "collision": "rename",
         "dedupe": "skip",
         "followSymlinks": False,
-        "othersEnabled": True
+        "othersEnabled": True,
+        "hashAlgorithm": "sha256"
     }
 }
 
 def _unique_preserve_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for s in items:
-        if s not in seen:
-            seen.add(s)
-            out.append(s)
-    return out
+    return list(dict.fromkeys(items))
+
+def _build_ext_index(categories: Dict[str, List[str]]) -> Dict[str, str]:
+    """Builds the flat extension -> category index. The first category listing an extension wins."""
+    ext2cat: Dict[str, str] = {}
+    for cat, exts in categories.items():
+        if isinstance(exts, list):
+            for e in exts:
+                if isinstance(e, str) and e:
+                    ext2cat.setdefault(e, cat)
+    return ext2cat
 
 def load_config(config_path):
     """Loads and normalizes the File Organizer configuration from a JSON file.
@@ -52,7 +63,9 @@ def load_config(config_path):
                     "dedupe": Literal["skip", "link", "delete"],
                     "followSymlinks": bool,
                     "othersEnabled": bool,
-                }
+                    "hashAlgorithm": Literal["sha256", "blake3", "xxh3"],
+                },
+                "_ext2cat": Dict[str, str],
             }
 
     Notes:
@@ -62,6 +75,9 @@ def load_config(config_path):
             * the leading dot is removed (".pdf" → "pdf"),
             * spaces are trimmed,
             * empty entries are discarded.
+        - Category names and extensions are interned (`sys.intern`), so lookups compare by identity first.
+        - "_ext2cat" is the flat extension -> category index built from `categories`
+          (the first category listing an extension wins), so classification is one lookup.
         - Unknown keys are ignored; only expected keys are combined.
         - No exceptions are raised: any error is treated as “use defaults”.
           This avoids breaking the CLI, but can hide faulty configurations.
@@ -70,13 +86,15 @@ def load_config(config_path):
     cfg: Dict[str, Any] = copy.deepcopy(DEFAULT_CONFIG)
 
     if not path.exists():
+        cfg["_ext2cat"] = _build_ext_index(cfg["categories"])
         return cfg
 
     try:
         raw: Dict[str, Any]
-        with path.open("r", encoding="utf-8") as f:
-            raw = json.load(f)
+        data = path.read_bytes()
+        raw = orjson.loads(data) if orjson is not None else json.loads(data)
     except (OSError, json.JSONDecodeError):
+        cfg["_ext2cat"] = _build_ext_index(cfg["categories"])
         return cfg
     
     categories = raw.get("categories")
@@ -93,8 +111,8 @@ def load_config(config_path):
                 if s.startswith("."):
                     s = s[1:]
                 if s:
-                    norm.append(s)
-            cleaned[cat.strip().lower()] = _unique_preserve_order(norm)
+                    norm.append(sys.intern(s))
+            cleaned[sys.intern(cat.strip().lower())] = _unique_preserve_order(norm)
 
         if cleaned:
             cfg["categories"] = cleaned
@@ -110,6 +128,9 @@ def load_config(config_path):
             beh["followSymlinks"] = behavior["followSymlinks"]
         if isinstance(behavior.get("othersEnabled"), bool):
             beh["othersEnabled"] = behavior["othersEnabled"]
+        if behavior.get("hashAlgorithm") in {"sha256", "blake3", "xxh3"}:
+            beh["hashAlgorithm"] = behavior["hashAlgorithm"]
         cfg["behavior"] = beh
 
+    cfg["_ext2cat"] = _build_ext_index(cfg["categories"])
     return cfg
@@ -2,22 +2,90 @@
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple
+import errno
+import os
 import re
 import shutil
 import hashlib
+import mmap
+import sqlite3
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
 
-def compute_file_hash(path: Path, block_size: int = 8 * 1024 * 1024) -> str:
-    """Calculates the hash using SHA-256 of a file reading by blocks. 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+HASH_ALGORITHMS = ("sha256", "blake3", "xxh3")
+_SUFFIX_RE = re.compile(r" \((\d+)\)$")
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+_MMAP_THRESHOLD = 64 * 1024 * 1024
+PARTIAL_HASH_MIN = 16 * 1024 * 1024
+_PARTIAL_SAMPLE = 64 * 1024
+_HASH_MEMO: Dict[Tuple[str, int, int, str], str] = {}
+_HASH_MEMO_NEW: Set[Tuple[str, int, int, str]] = set()
+_HASH_MEMO_GONE: Set[str] = set()
+_HASH_DB_CHUNK = 500
+# Destination directories where link() is not possible (move_file renames there instead).
+_NO_LINK_DIRS: Set[str] = set()
+_LINK_NEVER = {errno.EPERM, errno.EXDEV, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+class _Nop:
+    """Logger that discards every message (used when no logger is given)."""
+    def debug(self, *a, **k): pass
+    def info(self, *a, **k): pass
+    def warning(self, *a, **k): pass
+    def error(self, *a, **k): pass
+
+_NOP_LOGGER = _Nop()
+
+
+def _effective_algorithm(algorithm: str) -> str:
+    """Returns the algorithm that is actually used: "sha256" if blake3/xxhash is not installed.
+
+    Raises:
+        ValueError: If the algorithm is not supported.
+    """
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"invalid hash algorithm: {algorithm}")
+    if (algorithm == "blake3" and blake3 is None) or (algorithm == "xxh3" and xxhash is None):
+        return "sha256"
+    return algorithm
+
+def _new_hasher(algorithm: str):
+    """Returns a hasher for the algorithm; falls back to SHA-256 if blake3/xxhash is not installed."""
+    algorithm = _effective_algorithm(algorithm)
+    if algorithm == "blake3":
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    if algorithm == "xxh3":
+        return xxhash.xxh3_128()
+    return hashlib.sha256()
+
+def compute_file_hash(path: Path, block_size: int = 8 * 1024 * 1024, algorithm: str = "sha256") -> str:
+    """Calculates the hash using SHA-256 (or BLAKE3 / XXH3) of a file reading by blocks. 
 
     Args:
         path (Path): Path of the file to hash. 
         block_size (int, optional): Read block size (in bytes). Defaults to 8*1024*1024.
+        algorithm (str, optional): "sha256", "blake3" or "xxh3". BLAKE3 and XXH3 need the optional
+            `blake3` / `xxhash` packages, if they are not installed SHA-256 is used. XXH3 (128 bits)
+            is not cryptographic, it is only meant for duplicate detection. Defaults to "sha256".
+
+    Notes:
+        - Where posix_fadvise is available the kernel is told the read is sequential,
+          and the pages are dropped from the cache after hashing.
+        - Files of 64 MiB or more are memory-mapped and hashed without copying each block.
 
     Raises:
         IsADirectoryError, FileNotFoundError, PermissionError, OSError: 
             If the file does not exist or presents errors to be read or format issues. 
+        ValueError: If the algorithm is not supported.
 
     Returns:
         str: Returns the hexdigest.
@@ -29,18 +97,220 @@ def compute_file_hash(path: Path, block_size: int = 8 * 1024 * 1024) -> str:
     if path.is_dir():
         raise IsADirectoryError(f"The path is a directory: {path}")
 
-    hasher = hashlib.sha256()
-    with path.open("rb") as file:
-        for chunk in iter(lambda: file.read(block_size), b""):
-            hasher.update(chunk)
+    hasher = _new_hasher(algorithm)
+    with path.open("rb", buffering=0) as file:
+        fd = file.fileno()
+        if _HAS_FADVISE:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if os.fstat(fd).st_size >= _MMAP_THRESHOLD:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as mv:
+                for off in range(0, len(mv), block_size):
+                    hasher.update(mv[off:off + block_size])
+        else:
+            for chunk in iter(lambda: file.read(block_size), b""):
+                hasher.update(chunk)
+        if _HAS_FADVISE:
+            # The file is only read once; do not keep it in the page cache.
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
     return hasher.hexdigest()
 
-def next_name(dest: Path, *, max_tries: int = 9999) -> Path: 
+def compute_partial_hash(path: Path, algorithm: str = "sha256", sample: int = _PARTIAL_SAMPLE) -> str:
+    """Hashes the size and three blocks of a file (start, middle and end) instead of all of it.
+
+    Meant for duplicate detection of large files: two files of the same size with the same
+    sampled blocks are taken as equal. The result is prefixed with "partial:" so it never
+    matches a full digest.
+
+    Raises:
+        FileNotFoundError, PermissionError, OSError: If the file cannot be read.
+        ValueError: If the algorithm is not supported.
+
+    Returns:
+        str: "partial:" + hexdigest.
+    """
+    hasher = _new_hasher(algorithm)
+    with open(path, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        hasher.update(size.to_bytes(8, "little"))
+        for off in (0, max(0, size // 2 - sample // 2), max(0, size - sample)):
+            file.seek(off)
+            hasher.update(file.read(sample))
+    return "partial:" + hasher.hexdigest()
+
+def _memo_key(path_str: str, st: os.stat_result, algorithm: str, partial: bool) -> Tuple[str, int, int, str]:
+    """Key of a digest in the hash memo and the hash database.
+
+    It is tagged with the algorithm actually used (see _effective_algorithm), so SHA-256 digests
+    from a fallback never match real BLAKE3/XXH3 ones. Sampled digests get their own tag.
+    """
+    algorithm = _effective_algorithm(algorithm)
+    return (path_str, st.st_size, st.st_mtime_ns, algorithm + "/partial" if partial else algorithm)
+
+def cached_file_hash(path: Path, algorithm: str = "sha256", st: Optional[os.stat_result] = None, partial_min: Optional[int] = None) -> str:
+    """compute_file_hash memoized by (path, size, mtime_ns, algorithm).
+
+    A file that changed after it was hashed gets a new key, so a stale digest is never returned.
+
+    Args:
+        path (Path): File to hash.
+        algorithm (str, optional): "sha256", "blake3" or "xxh3". Defaults to "sha256".
+        st (Optional[os.stat_result], optional): stat of path if the caller already has it. Defaults to None.
+        partial_min (Optional[int], optional): Files of this size or more are hashed with
+            compute_partial_hash. Defaults to None (always hash the whole file).
+
+    Returns:
+        str: Returns the hexdigest.
+    """
+    if st is None:
+        st = os.stat(path)
+    partial = partial_min is not None and st.st_size >= partial_min
+    key = _memo_key(os.fspath(path), st, algorithm, partial)
+    digest = _HASH_MEMO.get(key)
+    if digest is None:
+        if partial:
+            digest = compute_partial_hash(path, algorithm=algorithm)
+        else:
+            digest = compute_file_hash(path, algorithm=algorithm)
+        _HASH_MEMO[key] = digest
+        _HASH_MEMO_NEW.add(key)
+    return digest
+
+def compute_many_hashes(paths: Iterable[Path], workers: Optional[int] = None, algorithm: str = "sha256", partial_min: Optional[int] = None) -> Dict[Path, str]:
+    """Calculates the hash of several files in parallel threads, through cached_file_hash.
+
+    The digests stay in the hash memo, so later cached_file_hash calls for the same unchanged
+    files (e.g. from apply_policies_move) do not read them again.
+
+    Args:
+        paths (Iterable[Path]): Files to hash.
+        workers (Optional[int], optional): Number of threads. Defaults to min(32, 2 * CPUs).
+        algorithm (str, optional): "sha256", "blake3" or "xxh3". Defaults to "sha256".
+        partial_min (Optional[int], optional): See cached_file_hash. Defaults to None.
+
+    Returns:
+        Dict[Path, str]: Hexdigest of each path. Files that cannot be read are left out.
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+
+    def _one(p: Path) -> Optional[str]:
+        try:
+            return cached_file_hash(p, algorithm, partial_min=partial_min)
+        except OSError:
+            return None
+
+    max_workers = min(workers or min(32, (os.cpu_count() or 1) * 2), len(paths))
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        return {p: d for p, d in zip(paths, ex.map(_one, paths)) if d is not None}
+
+def _carry_hash(src: Path, final: Path, st: os.stat_result, algorithm: str) -> None:
+    """Moves the memoized digests of src (full and sampled) to its new path (a rename keeps size and mtime)."""
+    src_str = os.fspath(src)
+    final_str = os.fspath(final)
+    for partial in (False, True):
+        old = _memo_key(src_str, st, algorithm, partial)
+        digest = _HASH_MEMO.pop(old, None)
+        if digest is None:
+            continue
+        _HASH_MEMO_NEW.discard(old)
+        key = _memo_key(final_str, st, algorithm, partial)
+        _HASH_MEMO[key] = digest
+        _HASH_MEMO_NEW.add(key)
+        _HASH_MEMO_GONE.add(src_str)
+
+def _open_hash_db(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(os.fspath(db_path))
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS hashdb ("
+        "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, algorithm TEXT, digest TEXT)"
+    )
+    return conn
+
+def load_hash_db(db_path: Path, paths: Iterable[str]) -> int:
+    """Seeds the hash memo (see cached_file_hash) with the digests stored for paths.
+
+    Only rows whose size and mtime still match the file on disk are used.
+
+    Args:
+        db_path (Path): SQLite database written by save_hash_db. Nothing is loaded if it does not exist.
+        paths (Iterable[str]): Files that may be hashed or compared against (plan sources and
+            destinations).
+
+    Raises:
+        sqlite3.Error: If the database cannot be read.
+
+    Returns:
+        int: Number of digests loaded.
+    """
+    if not db_path.is_file():
+        return 0
+    paths = list(dict.fromkeys(paths))
+    loaded = 0
+    conn = _open_hash_db(db_path)
+    try:
+        for i in range(0, len(paths), _HASH_DB_CHUNK):
+            chunk = paths[i:i + _HASH_DB_CHUNK]
+            rows = conn.execute(
+                f"SELECT path, size, mtime_ns, algorithm, digest FROM hashdb WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for path, size, mtime_ns, algorithm, digest in rows:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                    _HASH_MEMO[(path, size, mtime_ns, algorithm)] = digest
+                    loaded += 1
+    finally:
+        conn.close()
+    return loaded
+
+def save_hash_db(db_path: Path) -> int:
+    """Writes the digests computed since the last save to the SQLite database in one transaction.
+
+    Rows of files that were moved away are deleted.
+
+    Args:
+        db_path (Path): SQLite database (created if it does not exist).
+
+    Raises:
+        sqlite3.Error: If the database cannot be written.
+
+    Returns:
+        int: Number of rows written.
+    """
+    new = [k for k in list(_HASH_MEMO_NEW) if k in _HASH_MEMO]
+    new_paths = {k[0] for k in new}
+    gone = [p for p in list(_HASH_MEMO_GONE) if p not in new_paths]
+    if not new and not gone:
+        return 0
+    conn = _open_hash_db(db_path)
+    try:
+        with conn:
+            conn.executemany("DELETE FROM hashdb WHERE path = ?", [(p,) for p in gone])
+            conn.executemany(
+                "INSERT OR REPLACE INTO hashdb (path, size, mtime_ns, algorithm, digest) VALUES (?, ?, ?, ?, ?)",
+                [(k[0], k[1], k[2], k[3], _HASH_MEMO[k]) for k in new],
+            )
+    finally:
+        conn.close()
+    _HASH_MEMO_NEW.clear()
+    _HASH_MEMO_GONE.clear()
+    return len(new)
+
+def next_name(dest: Path, *, max_tries: int = 9999, dir_cache: Optional[Dict[Path, Set[str]]] = None) -> Path: 
     """Returns a free Path in destination, applies an incremental suffix if the file already exists.
 
+    The names of the parent directory are listed once and the candidates are probed in memory.
+
     Args:
         dest (Path): Desired destination path
         max_tries (int, optional): Attempts available to avoid infinite loops. Defaults to 9999.
+        dir_cache (Optional[Dict[Path, Set[str]]], optional): Directory listings shared between calls
+            of the same batch. The returned name is added to it. Defaults to None.
 
     Raises:
         ValueError: If attempts are less than 1. 
@@ -58,18 +328,95 @@ def next_name(dest: Path, *, max_tries: int = 9999) -> Path:
     stem = dest.stem
     suffix = dest.suffix
     
-    m = re.search(r" \((\d+)\)$", stem)
+    m = _SUFFIX_RE.search(stem)
     start_name = int(m.group(1)) + 1 if m else 1
     base_stem = stem[:m.start()] if m else stem
     
+    existing = dir_cache.get(parent) if dir_cache is not None else None
+    if existing is None:
+        existing = {p.name for p in parent.iterdir()}
+        if dir_cache is not None:
+            dir_cache[parent] = existing
+
     for name in range(start_name, start_name + max_tries):
-        cand = parent / f"{base_stem} ({name}){suffix}"
+        candidate = f"{base_stem} ({name}){suffix}"
+        if candidate in existing:
+            continue
+        cand = parent / candidate
         if not cand.exists():
+            existing.add(candidate)
             return cand
+        existing.add(candidate)
         
     raise FileExistsError(f"No free name for {dest} after {max_tries} attempts")
 
-def apply_policies_move(src: Path, dest: Path, *, collision_policy: str, dedupe_by_hash: bool, hash_cache: Optional[Dict[str, str]] = None, logger=None) -> Tuple[str, Path]: 
+def _link_move(src_str: str, dest_str: str) -> bool:
+    """Moves with link() + unlink(). Returns False if hard links cannot be used (the caller renames).
+
+    Raises:
+        FileExistsError: If dest already exists (link never replaces it).
+        FileNotFoundError: If src or the directory of dest does not exist.
+    """
+    dest_dir = os.path.dirname(dest_str)
+    if dest_dir in _NO_LINK_DIRS:
+        return False
+    try:
+        os.link(src_str, dest_str, follow_symlinks=False)
+    except (FileExistsError, FileNotFoundError):
+        raise
+    except NotImplementedError:
+        # No linkat() for follow_symlinks on this platform.
+        _NO_LINK_DIRS.add(dest_dir)
+        return False
+    except OSError as e:
+        # Only errors meaning "never possible here" are remembered; transient ones (EACCES,
+        # ENOSPC, EIO, EMLINK, ...) only make this file fall back to rename.
+        if e.errno in _LINK_NEVER:
+            _NO_LINK_DIRS.add(dest_dir)
+        return False
+    try:
+        os.unlink(src_str)
+    except OSError:
+        os.unlink(dest_str)
+        raise
+    return True
+
+def move_file(src: Path, dest: Path) -> None:
+    """Moves src to dest. 
+
+    Tries link() + unlink() first, which does not replace an existing dest and is cheaper than
+    rename() on several network filesystems. Falls back to a rename where hard links are not
+    supported (remembered per destination directory), and to shutil.move across devices.
+
+    Raises:
+        FileExistsError: If dest appeared after the caller checked it (instead of overwriting it).
+        FileNotFoundError: If src or the directory of dest does not exist.
+        OSError: Other I/O errors.
+    """
+    src_str = os.fspath(src)
+    dest_str = os.fspath(dest)
+    if _link_move(src_str, dest_str):
+        return
+    try:
+        os.rename(src_str, dest_str)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src_str, dest_str)
+
+def _remember(src: Path, final: Path, src_st: os.stat_result, hash_algorithm: str, file_hash: Optional[str], size: Optional[int], hash_cache: Optional[Dict[str, str]], size_cache: Optional[Dict[int, Optional[str]]]) -> None:
+    """Records the final destination of a moved file in the hash cache, or in the size cache if it was not hashed.
+
+    A memoized digest (e.g. from compute_many_hashes) follows the file in both cases.
+    """
+    _carry_hash(src, final, src_st, hash_algorithm)
+    if file_hash:
+        if hash_cache is not None:
+            hash_cache[file_hash] = os.fspath(final)
+    elif size is not None and size_cache is not None and size not in size_cache:
+        size_cache[size] = os.fspath(final)
+
+def apply_policies_move(src: Path, dest: Path, *, collision_policy: str, dedupe_by_hash: bool, hash_cache: Optional[Dict[str, str]] = None, logger=None, dir_cache: Optional[Dict[Path, Set[str]]] = None, hash_algorithm: str = "sha256", size_cache: Optional[Dict[int, Optional[str]]] = None, partial_hash_min: Optional[int] = None) -> Tuple[str, Path]: 
     """Applies collision and duplicate policies, executes the action and returns it and the destination. 
 
     Args:
@@ -79,6 +426,16 @@ def apply_policies_move(src: Path, dest: Path, *, collision_policy: str, dedupe_
         dedupe_by_hash (bool): Duplicate with hash. 
         hash_cache (Optional[Dict[str, str]], optional): Cache of duplicates. Defaults to None.
         logger (_type_, optional): Logs of the actions performed. Defaults to None.
+        dir_cache (Optional[Dict[Path, Set[str]]], optional): Directory listings reused by next_name. Defaults to None.
+        hash_algorithm (str, optional): Algorithm used by compute_file_hash. Defaults to "sha256".
+        size_cache (Optional[Dict[int, Optional[str]]], optional): Sizes already seen in the batch. A file
+            is only hashed when another file with its size was seen; the earlier one is hashed then
+            (its entry becomes None). Defaults to None (hash every file).
+        partial_hash_min (Optional[int], optional): Files of this size or more are compared with
+            compute_partial_hash (see PARTIAL_HASH_MIN). Defaults to None (hash whole files).
+
+    Notes:
+        - Digests come from cached_file_hash, so a file is not read again while its size and mtime are unchanged.
 
     Raises:
         IsADirectoryError: If the directory is incorrect 
@@ -88,36 +445,44 @@ def apply_policies_move(src: Path, dest: Path, *, collision_policy: str, dedupe_
         Tuple[str, Path]: Tuple that contains the action and the final destination. 
     """
     if logger is None: 
-        class _Nop:
-            def debug(self, *a, **k): pass
-            def info(self, *a, **k): pass
-            def warning(self, *a, **k): pass
-            def error(self, *a, **k): pass
-        logger = _Nop() 
+        logger = _NOP_LOGGER
         
     src = src if isinstance(src, Path) else Path(src)
     dest = dest if isinstance(dest, Path) else Path(dest)
     dest.parent.mkdir(parents=True, exist_ok=True)
     
     file_hash = None
+    size = None
     
     if dedupe_by_hash:
-        file_hash = compute_file_hash(src)
-        if hash_cache is not None:
+        src_st = src.stat()
+        if size_cache is not None:
+            size = src_st.st_size
+            if size in size_cache:
+                pending = size_cache[size]
+                if pending is not None:
+                    pending_path = Path(pending)
+                    if hash_cache is not None and pending_path.is_file():
+                        hash_cache.setdefault(cached_file_hash(pending_path, hash_algorithm, partial_min=partial_hash_min), pending)
+                    size_cache[size] = None
+                file_hash = cached_file_hash(src, hash_algorithm, src_st, partial_hash_min)
+        else:
+            file_hash = cached_file_hash(src, hash_algorithm, src_st, partial_hash_min)
+        if file_hash and hash_cache is not None:
             existing = hash_cache.get(file_hash)
             if existing:
                 existing_path = Path(existing)
                 if existing_path.exists() and existing_path.is_file():
-                    logger.info(f"[duplicate] {src} == {existing_path}")
+                    logger.info("[duplicate] %s == %s", src, existing_path)
                     return "duplicate", existing_path
             
     if dest.exists():
         if collision_policy == "rename":
-            final_destination = next_name(dest)
-            logger.debug(f"[rename] {dest.name} -> {final_destination.name}")
-            shutil.move(str(src), str(final_destination))
-            if hash_cache and dedupe_by_hash is not None and file_hash:
-                hash_cache[file_hash] = str(final_destination)
+            final_destination = next_name(dest, dir_cache=dir_cache)
+            logger.debug("[rename] %s -> %s", dest.name, final_destination.name)
+            move_file(src, final_destination)
+            if dedupe_by_hash:
+                _remember(src, final_destination, src_st, hash_algorithm, file_hash, size, hash_cache, size_cache)
             return "renamed", final_destination
         
         elif collision_policy == "keep-newest": 
@@ -129,25 +494,25 @@ def apply_policies_move(src: Path, dest: Path, *, collision_policy: str, dedupe_
                         if dest.is_file() or dest.is_symlink(): dest.unlink()
                         else:
                             raise IsADirectoryError(f"The destination is not a file: {dest}")
-                    shutil.move(str(src), str(dest))
+                    move_file(src, dest)
                 except Exception as e: 
-                    logger.error(f"[replace-failed] {src} -> {dest}: {e}")
+                    logger.error("[replace-failed] %s -> %s: %s", src, dest, e)
                     raise
-                if hash_cache and dedupe_by_hash is not None and file_hash: 
-                    hash_cache[file_hash] = str(dest)
+                if dedupe_by_hash:
+                    _remember(src, dest, src_st, hash_algorithm, file_hash, size, hash_cache, size_cache)
                 return "moved", dest
             else: 
-                logger.debug(f"[keep-newest:skipped] {src} (older-or-equal) vs {dest}")
+                logger.debug("[keep-newest:skipped] %s (older-or-equal) vs %s", src, dest)
                 return "skipped", dest
             
         elif collision_policy == "skip":
-            logger.debug(f"[skip] {src} -> {dest} (exists)")
+            logger.debug("[skip] %s -> %s (exists)", src, dest)
             return "skipped", dest
         
         else: 
             raise ValueError(f"invalid collision_policy: {collision_policy}")
     
-    shutil.move(str(src), str(dest))
-    if hash_cache and dedupe_by_hash is not None and file_hash:
-        hash_cache[file_hash] = str(dest)
+    move_file(src, dest)
+    if dedupe_by_hash:
+        _remember(src, dest, src_st, hash_algorithm, file_hash, size, hash_cache, size_cache)
     return "moved", dest
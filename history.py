@@ -3,18 +3,48 @@
 from __future__ import annotations
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import json
 import os
+import base64
 import secrets
-import string
+import atexit
 import logging
-import copy
+import codecs
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from .logger import setup_logger
 
 DEFAULT_HISTORY: Dict[str, Any] = {"version": 1, "batches": []}
 _logger = logging.getLogger("File_Organizer")
+# Parsed histories of this process (see get_history) and the ones that received batches since.
+_HISTORY_CACHE: Dict[Path, Dict[str, Any]] = {}
+_HISTORY_DIRTY: set[Path] = set()
+# append_batch folds the sidecar into history.json once it reaches this size, or half the size
+# of history.json if that is larger (so each rewrite is paid for by as many appended bytes).
+_SIDECAR_FOLD_MIN = 256 * 1024
+
+def _fresh_default() -> Dict[str, Any]:
+    """Returns a new default history (same content as DEFAULT_HISTORY)."""
+    return {"version": 1, "batches": []}
+
+def _loads(raw: bytes) -> Any:
+    """Parses JSON bytes with orjson when it is installed, with json otherwise."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _dump_json(data: Any, file, *, indent: bool) -> None:
+    """Writes data as UTF-8 JSON to a binary file, with orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        file.write(orjson.dumps(data, option=option, default=_json_default))
+    else:
+        json.dump(data, codecs.getwriter("utf-8")(file), ensure_ascii=False, indent=2 if indent else None, default=_json_default)
 
 def parent_dir(path: Path) -> None:
     """Creates the parent directory for path if it does not exist.
@@ -39,8 +69,7 @@ def generate_batch_id(prefix: str= "") -> str:
         str: Unique batch ID. 
     """
     ts = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%SZ")
-    alphabet = string.ascii_uppercase + string.digits
-    rand = "".join(secrets.choice(alphabet) for _ in range(5))
+    rand = base64.b32encode(secrets.token_bytes(4))[:5].decode("ascii")
     core = f"{ts}-{rand}"
     norm = prefix.strip("-") if prefix else ""
     return f"{norm}-{core}" if norm else core
@@ -62,58 +91,135 @@ def atomic_write_json(path: Path, data: Dict[str, Any]) -> None:
     parent_dir(path)
     tmp_name = f"{path.name}.tmp-{secrets.token_hex(4)}"
     tmp_path = path.with_name(tmp_name)
-    json_text = json.dumps(data, ensure_ascii=False, indent=2)
-    with tmp_path.open("w", encoding="utf-8", newline="\n") as file:
-        file.write(json_text)
+    with tmp_path.open("wb") as file:
+        _dump_json(data, file, indent=True)
         file.flush()
         os.fsync(file.fileno())
 
     os.replace(tmp_path, path)
     
+def sidecar_path(path: Path) -> Path:
+    """Returns the path of the append-only batches file next to history.json (history.ndjson)."""
+    return Path(path).with_suffix(".ndjson")
+
+def _read_sidecar(path: Path) -> List[Dict[str, Any]]:
+    """Reads the batches appended to the sidecar of path. Invalid lines are ignored."""
+    side = sidecar_path(path)
+    try:
+        with side.open("rb") as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        _logger.error(f"Could not read {side.name} ({side}): {e}; ignoring appended batches.")
+        return []
+
+    out: List[Dict[str, Any]] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = _loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            _logger.warning(f"Invalid line in {side.name}; ignored.")
+            continue
+        if isinstance(rec, dict):
+            out.append(rec)
+    return out
+
 def load_history(path: Path) -> Dict[str, Any]:
     """Loads a history. If it does not exist or is invalid returns a default history.
 
+    The batches appended to the sidecar (history.ndjson) are added after the ones of history.json.
+
     Args:
         path (Path): Path to the history.json file.
 
     Returns:
         Dict[str, Any]: Structure of the history. 
     """
-    p = Path(path)
+    data = _load_snapshot(Path(path))
+    appended = _read_sidecar(path)
+    if appended:
+        known = {b.get("batch_id") for b in data["batches"] if isinstance(b, dict)}
+        data["batches"].extend(b for b in appended if b.get("batch_id") not in known)
+    return data
+
+def _load_snapshot(p: Path) -> Dict[str, Any]:
+    """Loads history.json only (without the sidecar). If it does not exist or is invalid returns a default history."""
     try:
         if not p.exists():
             _logger.info(f"history.json does not exist, creating a new one in: {p}")
             atomic_write_json(p, DEFAULT_HISTORY)
-            return copy.deepcopy(DEFAULT_HISTORY)
+            return _fresh_default()
 
-        raw = p.read_text(encoding="utf-8").strip()
+        raw = p.read_bytes().strip()
         if not raw:
             _logger.warning("history.json is empty; using defaults.")
-            return copy.deepcopy(DEFAULT_HISTORY)
+            return _fresh_default()
 
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as e:
+            data = _loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
             _logger.error(f"history.json corrupted ({p}): {e}; using defaults.")
-            return copy.deepcopy(DEFAULT_HISTORY)
+            return _fresh_default()
 
         if not isinstance(data, dict):
             _logger.warning("history.json is not a dict; using defaults.")
-            return copy.deepcopy(DEFAULT_HISTORY)
+            return _fresh_default()
         if "version" not in data or not isinstance(data["version"], int):
             data["version"] = DEFAULT_HISTORY["version"]
         if "batches" not in data or not isinstance(data["batches"], list):
             data["batches"] = []
 
-        return copy.deepcopy(data)
+        return data
 
     except OSError as e:
         _logger.error(f"Could not read history.json ({p}): {e}; using defaults.")
-        return copy.deepcopy(DEFAULT_HISTORY)
+        return _fresh_default()
+
+def get_history(path: Path) -> Dict[str, Any]:
+    """Returns the history of path, loading it only the first time in the process.
+
+    The returned dict is shared: batches added later with append_batch are appended to it.
+
+    Args:
+        path (Path): Path to the history.json file.
+
+    Returns:
+        Dict[str, Any]: Structure of the history.
+    """
+    key = Path(path)
+    hist = _HISTORY_CACHE.get(key)
+    if hist is None:
+        hist = load_history(key)
+        _HISTORY_CACHE[key] = hist
+    return hist
+
+def flush_history_cache() -> None:
+    """Folds the sidecar into history.json for the cached histories that received batches.
+
+    Registered with atexit, so a process that loaded and then extended a history rewrites it once.
+    The history is read again from disk so batches appended by other processes are kept.
+    """
+    for key in list(_HISTORY_DIRTY):
+        if not sidecar_path(key).exists():
+            continue
+        try:
+            save_history(key, load_history(key))
+        except Exception as e:
+            _logger.warning(f"history.ndjson not folded into {key} at exit: {e}")
+    _HISTORY_DIRTY.clear()
+
+atexit.register(flush_history_cache)
 
 def save_history(path: Path, data: Dict[str, Any]) -> None: 
     """Saves the history using atomic write.
     
+    The sidecar (history.ndjson) is removed afterwards, data must be the complete history
+    (for example, the one returned by load_history).
+
     Args:
         path (Path): Destination path of the history.json file.
         data (Dict[str, Any]): Complete structure to persist. 
@@ -124,24 +230,95 @@ def save_history(path: Path, data: Dict[str, Any]) -> None:
     """
     try:
         atomic_write_json(path, data)
+        sidecar_path(path).unlink(missing_ok=True)
+        key = Path(path)
+        if key in _HISTORY_CACHE:
+            _HISTORY_CACHE[key] = data
+        _HISTORY_DIRTY.discard(key)
         _logger.info(f"history.json saved: {path}")
     except Exception as e:
         _logger.error(f"Error saving history.json: {e}")
         raise
 
-def to_jsonable(obj: Any) -> Any:
-    """Converts non-serializable objects to JSON types."""
+def pack_plan(records: List[Dict[str, Any]]) -> Tuple[List[str], List[List[Any]]]:
+    """Compacts the executed plan for history: every directory is stored once.
+
+    Args:
+        records (List[Dict[str, Any]]): Steps {"src", "dest", "action"} (str or Path).
+
+    Returns:
+        Tuple[List[str], List[List[Any]]]: Directory table ("plan_dirs") and the rows
+            [src_dir_id, src_name, dest_dir_id, dest_name, action] ("plan"). Read them back with expand_plan.
+    """
+    dirs: Dict[str, int] = {}
+    split = os.path.split
+    rows: List[List[Any]] = []
+    for rec in records:
+        src_dir, src_name = split(os.fspath(rec["src"]))
+        dest_dir, dest_name = split(os.fspath(rec["dest"]))
+        sid = dirs.setdefault(src_dir, len(dirs))
+        did = dirs.setdefault(dest_dir, len(dirs))
+        rows.append([sid, src_name, did, dest_name, rec["action"]])
+    return list(dirs), rows
+
+def expand_plan(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Returns the plan of a batch as a list of {"src", "dest", "action"} dicts.
+
+    Batches written with pack_plan ("plan_dirs" present) are expanded; older batches are returned as is.
+    """
+    plan = batch.get("plan")
+    if not isinstance(plan, list):
+        return []
+    dirs = batch.get("plan_dirs")
+    if not isinstance(dirs, list):
+        return plan
+    join = os.path.join
+    steps: List[Dict[str, Any]] = []
+    for row in plan:
+        try:
+            sid, src_name, did, dest_name, action = row
+            steps.append({"src": join(dirs[sid], src_name), "dest": join(dirs[did], dest_name), "action": action})
+        except (TypeError, ValueError, IndexError):
+            steps.append({})
+    return steps
+
+def _json_default(obj: Any) -> Any:
+    """Converts the non-serializable objects found by json (Path, tuple, set) to JSON types."""
     if isinstance(obj, Path):
         return str(obj)
-    if isinstance(obj, dict):
-        return {k: to_jsonable(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple, set)):
-        return [to_jsonable(v) for v in obj]
-    return obj
+    if isinstance(obj, (tuple, set)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def append_batch_jsonl(path: Path, batch_id: str, record: Dict[str, Any]) -> None:
+    """Appends one batch as a JSON line to the sidecar of history.json (history.ndjson).
+
+    Only the new record is written, the existing history is not read nor rewritten.
+
+    Args:
+        path (Path): Path to the history.json file.
+        batch_id (str): Batch ID.
+        record (Dict[str, Any]): Normalized record of the batch. Path, tuple and set values are
+            serialized as strings and lists.
+
+    Raises:
+        OSError: If an I/O error occurs when writing the file.
+    """
+    side = sidecar_path(path)
+    parent_dir(side)
+    batch_record: Dict[str, Any] = {"batch_id": batch_id, **record}
+    with side.open("ab") as file:
+        _dump_json(batch_record, file, indent=False)
+        file.write(b"\n")
+        file.flush()
+        os.fsync(file.fileno())
 
 def append_batch(path: Path, batch_id: str, record: Dict[str, Any]) -> None:
-    """Adds a batch to the history.json file safely. Normalizes the record, validates fields,
-    and adds to batches. 
+    """Adds a batch to the history safely. Normalizes the record, validates fields,
+    and appends it to the sidecar (history.ndjson) with append_batch_jsonl. 
+
+    When the sidecar has grown past 256 KiB (or half the size of history.json, if larger) it is
+    folded into history.json, so it does not grow without bound.
 
     Args:
         path (Path): Path to the history.json file.
@@ -151,7 +328,7 @@ def append_batch(path: Path, batch_id: str, record: Dict[str, Any]) -> None:
             - command: str.
             - source_dir: str | Path.
             - dest_dir: str | Path.
-            - plan: List.
+            - plan: List (dict steps, or rows of pack_plan together with "plan_dirs").
             - stats: Dict.
 
     Raises:
@@ -189,20 +366,47 @@ def append_batch(path: Path, batch_id: str, record: Dict[str, Any]) -> None:
         rec["source_dir"] = str(rec["source_dir"])
     if "dest_dir" in rec and isinstance(rec["dest_dir"], Path):
         rec["dest_dir"] = str(rec["dest_dir"])
-    rec["plan"] = to_jsonable(plan)
-    rec["stats"] = to_jsonable(stats)
-    hist = load_history(path)
-    if "batches" not in hist or not isinstance(hist["batches"], list):
-        hist["batches"] = []
-
-    batch_record: Dict[str, Any] = {"batch_id": batch_id, **rec}
-    hist["batches"].append(batch_record)
-    save_history(path, hist)
+    try:
+        append_batch_jsonl(path, batch_id, rec)
+    except Exception as e:
+        _logger.error(f"Error saving history batch: {e}")
+        raise
+    key = Path(path)
+    cached = _HISTORY_CACHE.get(key)
+    if cached is not None:
+        cached["batches"].append({"batch_id": batch_id, **rec})
+        _HISTORY_DIRTY.add(key)
     _logger.info(f"Batch added to history: {batch_id}")
+    _maybe_fold_sidecar(key)
+
+def _maybe_fold_sidecar(path: Path) -> None:
+    """Folds the sidecar into history.json when it outgrows _SIDECAR_FOLD_MIN / half of history.json.
+
+    The batch is already stored in the sidecar, so a failed fold is only logged.
+    """
+    try:
+        side_size = sidecar_path(path).stat().st_size
+        try:
+            snap_size = path.stat().st_size
+        except FileNotFoundError:
+            snap_size = 0
+    except OSError:
+        return
+    if side_size < max(_SIDECAR_FOLD_MIN, snap_size // 2):
+        return
+    try:
+        save_history(path, load_history(path))
+    except Exception as e:
+        _logger.warning(f"history.ndjson not folded into {path.name}: {e}")
 
 def get_last_batch_id(path: Path, command: Optional[str] = None) -> Optional[str]:
     """Gets the ID of the last batch, using a timestamp.
 
+    Within the sidecar (history.ndjson) the last matching line is the newest (append order wins).
+    It is compared by timestamp with the newest matching batch of history.json, so batches
+    edited or imported into history.json with a later time are still found; on a tie the
+    sidecar wins.
+
     Args:
         path (Path): Path to the history.json file.
         command (str | None, optional): Only consider batches with a matching command (must be indicated). Defaults to None.
@@ -229,27 +433,43 @@ def get_last_batch_id(path: Path, command: Optional[str] = None) -> Optional[str
             except Exception:
                 return 0.0
 
-    hist = load_history(path)
-    batches = hist.get("batches")
-    if not isinstance(batches, list) or not batches:
-        return None
-
-    cand: List[Tuple[str, float]] = []
-    for rec in batches:
+    def _ts_key(ts: Any) -> str:
+        # "YYYY-MM-DDTHH:MM:SS" (optionally with "Z") sorts as a string; other forms are parsed.
+        if isinstance(ts, str):
+            s = ts.strip()
+            if len(s) >= 19 and s[10:11] == "T" and s[19:] in ("", "Z"):
+                return s[:19]
+        parsed = _parse_ts(ts)
+        if not parsed:
+            return ""
+        return datetime.fromtimestamp(parsed, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+    def _matches(rec: Any) -> bool:
         if not isinstance(rec, dict):
-            continue
+            return False
         if command:
             cmd = rec.get("command")
             if not isinstance(cmd, str) or cmd.lower() != command.lower():
-                continue
+                return False
         bid = rec.get("batch_id")
-        if not isinstance(bid, str) or not bid:
-            continue
-        ts = rec.get("created_at") or rec.get("timestamp")
-        cand.append((bid, _parse_ts(ts)))
+        return isinstance(bid, str) and bool(bid)
+
+    best: Optional[Tuple[str, str]] = None
+    for rec in reversed(_read_sidecar(path)):
+        if _matches(rec):
+            best = (rec["batch_id"], _ts_key(rec.get("created_at") or rec.get("timestamp")))
+            break
+
+    hist = _load_snapshot(Path(path))
+    batches = hist.get("batches")
+    if not isinstance(batches, list) or not batches:
+        return best[0] if best else None
 
-    if not cand:
-        return None
+    for rec in batches:
+        if not _matches(rec):
+            continue
+        ts = _ts_key(rec.get("created_at") or rec.get("timestamp"))
+        if best is None or ts > best[1]:
+            best = (rec["batch_id"], ts)
 
-    cand.sort(key=lambda x: x[1], reverse=True)
-    return cand[0][0]
+    return best[0] if best else None
@@ -3,6 +3,44 @@
 import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from typing import Callable, Optional
+
+class _LazyHandler(logging.Handler):
+    """Handler that builds the real handler with `factory` on the first emitted record and delegates to it.
+
+    Level filtering is done by this wrapper, the real handler only formats and writes. Errors of
+    the factory (e.g. `log_dir` cannot be created) go to `handleError` like any handler error; the
+    factory is not retried after a failure and later records are dropped.
+    """
+
+    def __init__(self, factory: Callable[[], logging.Handler], level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+        self._factory = factory
+        self._handler: Optional[logging.Handler] = None
+        self._failed = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._failed:
+            return
+        try:
+            if self._handler is None:
+                try:
+                    self._handler = self._factory()
+                except Exception:
+                    self._failed = True
+                    raise
+            self._handler.emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        if self._handler is not None:
+            self._handler.flush()
+
+    def close(self) -> None:
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
 
 def setup_logger(log_dir: Path,
     name: str = "File_Organizer",
@@ -28,6 +66,8 @@ def setup_logger(log_dir: Path,
         ValueError: If `max_bytes <= 0` or `backup_count < 0`.
 
     Notes:
+        - Handlers, formatters and `log_dir` are created lazily, when the first record is
+          emitted; a run that logs nothing (e.g. `--help`) does not touch the filesystem.
         - Creates `log_dir` automatically if it does not exist.
         - Main file: ``log_dir / f"{name}.log"``.
         - Includes:
@@ -50,7 +90,6 @@ def setup_logger(log_dir: Path,
         raise ValueError("backup_count must be >= 0")
 
     log_dir = Path(log_dir)
-    log_dir.mkdir(parents=True, exist_ok=True)
     log_path = log_dir / f"{name}.log"
     logger = logging.getLogger(name)
     logger.propagate = False
@@ -61,28 +100,29 @@ def setup_logger(log_dir: Path,
             h.setLevel(level)
         return logger
 
-    file_format = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    console_format = logging.Formatter("%(levelname)s: %(message)s")
-
-    file_handler = RotatingFileHandler(
-        log_path,
-        maxBytes=max_bytes,
-        backupCount=backup_count,
-        encoding="utf-8",
-        delay=True, 
-    )
-    file_handler.setLevel(level)
-    file_handler.setFormatter(file_format)
-
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-    console_handler.setFormatter(console_format)
+    def _file_handler() -> logging.Handler:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            log_path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True, 
+        )
+        file_handler.setFormatter(logging.Formatter(
+            fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        ))
+        return file_handler
+
+    def _console_handler() -> logging.Handler:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        return console_handler
+
     logger.setLevel(level)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(_LazyHandler(_file_handler, level))
+    logger.addHandler(_LazyHandler(_console_handler, level))
     logger.debug("Logger started")
 
     return logger
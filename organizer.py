@@ -1,18 +1,28 @@
 # organizer.py (English)
 
+import functools
 import logging
-import shutil
-from datetime import datetime
+import operator
+import os
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
-from .cli import build_cli_parser
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from .cli import build_cli_parser, default_workers
 from .config_loader import load_config
-from .file_utils import apply_policies_move, next_name
-from .history import generate_batch_id, append_batch, load_history, get_last_batch_id
+from .file_utils import PARTIAL_HASH_MIN, apply_policies_move, compute_many_hashes, move_file, next_name, load_hash_db, save_hash_db
+from .history import generate_batch_id, append_batch, get_history, get_last_batch_id, pack_plan, expand_plan
 from .logger import setup_logger
-from .planner import (discover_files, filter_files, build_plan, apply_collision_policy, apply_dedupe_policy, render_plan,)
+from .planner import (iter_discover_file_infos, iter_filter_files, iter_build_plan, iter_apply_collision_policy, apply_dedupe_policy, render_plan, parse_categories,)
 
-def undo_move_one(dest_str: str, src_str: str, logger) -> str:
+PARALLEL_MIN_STEPS = 32
+HASH_DB_NAME = "hashdb.sqlite"
+_SRC_KEYS = ("src", "source", "path", "from", "input")
+_DEST_KEYS = ("dest", "dst", "destination", "target", "to", "dest_path", "final_dest", "proposed_dest")
+
+def undo_move_one(dest_str: str, src_str: str, logger, src_entries: Optional[Set[str]] = None) -> str:
     """Reverts from destination to its original src. Reverts the last move. 
     
     The file is restored with an alternative name if src already existed.
@@ -21,6 +31,9 @@ def undo_move_one(dest_str: str, src_str: str, logger) -> str:
         dest_str (str): Current path of the file.
         src_str (str): Original path of the file.
         logger (_type_): Logger for the messages. 
+        src_entries (Optional[Set[str]], optional): Casefolded names already present in the
+            directory of src (see _list_parents). If given, it replaces the existence check of
+            src and the restored name is added to it. Defaults to None.
 
     Returns:
         str: Result code: 
@@ -31,26 +44,52 @@ def undo_move_one(dest_str: str, src_str: str, logger) -> str:
     """
     dest = Path(dest_str)
     src = Path(src_str)
-    
-    if not dest.exists():
-        logger.warning(f"[undo-missing] Does not exist in destination: {dest}")
-        return "missing"
-    
-    src.parent.mkdir(parents=True, exist_ok=True)
-    final_src = src
-    if final_src.exists():
+    if src_entries is not None and src.name.casefold() not in src_entries:
+        final_src = src
+    else:
         final_src = next_name(src)
     try:
-        shutil.move(str(dest), str(final_src))
-        if str(final_src) == src_str:
+        try:
+            move_file(dest, final_src)
+        except FileNotFoundError:
+            if not dest.exists():
+                logger.warning("[undo-missing] Does not exist in destination: %s", dest)
+                return "missing"
+            src.parent.mkdir(parents=True, exist_ok=True)
+            move_file(dest, final_src)
+        if src_entries is not None:
+            src_entries.add(final_src.name.casefold())
+        if os.fspath(final_src) == src_str:
             return "restored"
         else:
-            logger.info(f"[undo-renamed] {src} already existed; {final_src.name} restored.")
+            logger.info("[undo-renamed] %s already existed; %s restored.", src, final_src.name)
             return "renamed-dest"
     except Exception as e:
-        logger.error(f"[undo-error] {dest} -> {final_src}: {e}")
+        logger.error("[undo-error] %s -> %s: %s", dest, final_src, e)
         return "skipped"
         
+def _list_parents(paths: List[str]) -> Dict[str, Set[str]]:
+    """Lists once each distinct parent directory of paths.
+
+    Returns:
+        Dict[str, Set[str]]: Casefolded entry names by parent directory (empty if it does not exist).
+            Casefolding keeps the check conservative on case-insensitive filesystems.
+    """
+    listings: Dict[str, Set[str]] = {}
+    for p in paths:
+        parent = os.path.dirname(p)
+        if parent in listings:
+            continue
+        try:
+            listings[parent] = {name.casefold() for name in os.listdir(parent or ".")}
+        except OSError:
+            listings[parent] = set()
+    return listings
+
+_DEFAULT_HISTORY_PATH = Path.home() / ".fo" / "history.json"
+_DEFAULT_CONFIG_PATH = Path(__file__).parent / "config.json"
+
+@functools.lru_cache(maxsize=8)
 def resolve_history_path(cli_value: Optional[str]) -> Path:
     """Resolves the path of the history file: history.json.
     
@@ -61,16 +100,20 @@ def resolve_history_path(cli_value: Optional[str]) -> Path:
 
     Returns:
         Path: Absolute path to the history file. 
+
+    Notes:
+        - The result is memoized per cli_value, so the path is resolved once per process.
     """
     if cli_value:
         return Path(cli_value).expanduser().resolve()
-    return (Path.home() / ".fo" / "history.json").resolve()  
+    return _DEFAULT_HISTORY_PATH.resolve()  
 
+@functools.lru_cache(maxsize=8)
 def resolve_config_path(cli_value: Optional[str]) -> Path:
-    """Returns the path to config.json (future flag or next to this file)."""
+    """Returns the path to config.json (future flag or next to this file), memoized per cli_value."""
     if cli_value:
         return Path(cli_value).expanduser().resolve()
-    return (Path(__file__).parent / "config.json").resolve()
+    return _DEFAULT_CONFIG_PATH.resolve()
 
 def extract_src_dest(step: dict) -> tuple[Optional[str], Optional[str]]:
     """Extracts candidate src and destination paths from the dictionary: step.
@@ -86,13 +129,249 @@ def extract_src_dest(step: dict) -> tuple[Optional[str], Optional[str]]:
     Returns:
         tuple[Optional[str], Optional[str]]: Pair with the paths found (src, dest) or None if there are no matches
     """
-    src_candidates = ("src", "source", "path", "from", "input")
-    dest_candidates = ("dest", "dst", "destination", "target", "to", "dest_path", "final_dest", "proposed_dest")
-
-    src = next((step[k] for k in src_candidates if k in step and step[k]), None)
-    dest = next((step[k] for k in dest_candidates if k in step and step[k]), None)
+    get = step.get
+    src = get("src")
+    dest = get("dest")
+    if src and dest:
+        return src, dest
+
+    for k in _SRC_KEYS:
+        src = get(k)
+        if src:
+            break
+    else:
+        src = None
+    for k in _DEST_KEYS:
+        dest = get(k)
+        if dest:
+            break
+    else:
+        dest = None
     return src, dest
 
+def _schema_extractor(plan: List[dict]) -> Callable[[dict], Tuple[Any, Any]]:
+    """Returns an extract_src_dest specialized to the keys of plan[0].
+
+    Plans built by the planner share one key schema, so the src/dest keys are resolved once and
+    read with an itemgetter. A step that lacks them, has an empty value or has a key that
+    extract_src_dest would prefer goes through extract_src_dest, so the result is always the same.
+    """
+    first = plan[0] if plan else None
+    if not isinstance(first, dict):
+        return extract_src_dest
+    src_key = next((k for k in _SRC_KEYS if first.get(k)), None)
+    dest_key = next((k for k in _DEST_KEYS if first.get(k)), None)
+    if src_key is None or dest_key is None:
+        return extract_src_dest
+
+    preferred = _SRC_KEYS[:_SRC_KEYS.index(src_key)] + _DEST_KEYS[:_DEST_KEYS.index(dest_key)]
+    getter = operator.itemgetter(src_key, dest_key)
+
+    def _extract(step: dict) -> Tuple[Any, Any]:
+        try:
+            src, dest = getter(step)
+        except (KeyError, TypeError):
+            return extract_src_dest(step)
+        if not src or not dest:
+            return extract_src_dest(step)
+        for k in preferred:
+            if k in step:
+                return extract_src_dest(step)
+        return src, dest
+
+    return _extract
+
+def _apply_step(step: dict, command: str, policy: Dict[str, Any], logger, extract: Callable[[dict], Tuple[Any, Any]] = extract_src_dest) -> Optional[dict]:
+    """Applies one plan step with apply_policies_move.
+
+    Returns:
+        Optional[dict]: Record {"src", "dest", "action"} for history, None if the step has no src/dest.
+    """
+    src_str, dest_str = extract(step)
+    if not src_str or not dest_str:
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("[%s] item without src/dest (keys=%s): %s", command, list(step.keys()), step)
+        return None
+
+    # Plan entries already hold Paths (or str); apply_policies_move only converts what it needs.
+    try:
+        action, final_dest = apply_policies_move(src_str, dest_str, logger=logger, **policy)
+    except Exception as e:
+        logger.error("[%s-error] %s -> %s: %s", command, src_str, dest_str, e)
+        action, final_dest = "skipped", dest_str
+
+    return {
+        "src": os.fspath(src_str),
+        "dest": os.fspath(final_dest),
+        "action": action
+    }
+
+def _independent_groups(plan: List[dict], by_size: bool, extract: Callable[[dict], Tuple[Any, Any]] = extract_src_dest) -> List[List[int]]:
+    """Splits the plan indices in groups that can be applied concurrently.
+
+    Steps that share a destination directory (collisions, renames) or, with dedupe by hash,
+    a file size (possible duplicates) end up in the same group, in plan order.
+    """
+    parent: Dict[Any, Any] = {}
+
+    def find(k: Any) -> Any:
+        parent.setdefault(k, k)
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    first_keys: List[Any] = []
+    for idx, step in enumerate(plan):
+        src_str, dest_str = extract(step)
+        keys: List[Any] = []
+        if dest_str:
+            keys.append(("dir", os.path.dirname(os.fspath(dest_str))))
+        if by_size and src_str:
+            try:
+                keys.append(("size", os.stat(src_str).st_size))
+            except OSError:
+                pass
+        if not keys:
+            keys.append(("step", idx))
+        root = find(keys[0])
+        for k in keys[1:]:
+            other = find(k)
+            if other != root:
+                parent[other] = root
+        first_keys.append(keys[0])
+
+    groups: Dict[Any, List[int]] = {}
+    for idx, k in enumerate(first_keys):
+        groups.setdefault(find(k), []).append(idx)
+    return list(groups.values())
+
+def _run_plan(plan: List[dict], command: str, args, cfg, logger, hash_db: Optional[Path] = None) -> Tuple[List[dict], Dict[str, int]]:
+    """Applies every step of the plan and counts the actions.
+
+    With at least PARALLEL_MIN_STEPS steps the plan is applied by independent groups (see
+    _independent_groups), one destination directory after another, which keeps each directory
+    hot in the dentry cache. With more than one worker (`--workers`) the groups run in a thread pool.
+    Records keep plan order in both cases.
+
+    Args:
+        plan (List[dict]): Plan entries (see extract_src_dest).
+        command (str): "run" or "merge", used in the log messages.
+        args: Namespace from CLI: collision, dedupe, workers and strict_dedupe.
+        cfg (dict): Configuration (behavior.hashAlgorithm).
+        logger: Logger for console outputs.
+        hash_db (Optional[Path], optional): SQLite file with the digests of earlier runs. With
+            dedupe by hash it seeds the hash memo and receives the new digests. Defaults to None.
+
+    Returns:
+        Tuple[List[dict], Dict[str, int]]: Records (src/dest/action) in plan order and
+            stats (moved/renamed/skipped/duplicates). Steps without src/dest count as skipped.
+    """
+    dedupe_by_hash = (args.dedupe == "skip")
+    policy: Dict[str, Any] = {
+        "collision_policy": args.collision,
+        "dedupe_by_hash": dedupe_by_hash,
+        "hash_cache": {},
+        "dir_cache": {},
+        "hash_algorithm": cfg.get("behavior", {}).get("hashAlgorithm", "sha256"),
+        "size_cache": {},
+        "partial_hash_min": None if getattr(args, "strict_dedupe", False) else PARTIAL_HASH_MIN,
+    }
+    extract = _schema_extractor(plan)
+    use_hash_db = dedupe_by_hash and hash_db is not None
+    if use_hash_db:
+        try:
+            # Digests are carried to the destination of each move, so both sides are preloaded.
+            loaded = load_hash_db(hash_db, (str(Path(p)) for pair in map(extract, plan) for p in pair if p))
+            logger.debug(f"[{command}] {loaded} hashes loaded from {hash_db}")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[{command}] hash database not loaded ({hash_db}): {e}")
+    results: List[Optional[dict]] = [None] * len(plan)
+
+    workers = getattr(args, "workers", None) or default_workers()
+    if dedupe_by_hash and workers > 1:
+        # Same-size files are hashed during apply anyway, one after another inside their
+        # group (see _independent_groups); hash them up front in parallel into the memo.
+        by_size: Dict[int, List[Path]] = {}
+        for s, _ in map(extract, plan):
+            if s:
+                try:
+                    by_size.setdefault(os.stat(s).st_size, []).append(Path(s))
+                except (OSError, TypeError):
+                    continue
+        shared = [s for group in by_size.values() if len(group) > 1 for s in group]
+        if shared:
+            hashed = compute_many_hashes(shared, workers=workers, algorithm=policy["hash_algorithm"], partial_min=policy["partial_hash_min"])
+            logger.debug(f"[{command}] {len(hashed)} same-size files hashed up front")
+    if len(plan) >= PARALLEL_MIN_STEPS:
+        def _apply_group(idxs: List[int]) -> None:
+            for i in idxs:
+                results[i] = _apply_step(plan[i], command, policy, logger, extract)
+
+        groups = _independent_groups(plan, by_size=dedupe_by_hash, extract=extract)
+        if workers > 1:
+            logger.debug(f"[{command}] {len(groups)} independent groups, {workers} workers")
+            with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as ex:
+                list(ex.map(_apply_group, groups))
+        else:
+            for idxs in groups:
+                _apply_group(idxs)
+    else:
+        apply_step = _apply_step
+        results = [apply_step(step, command, policy, logger, extract) for step in plan]
+
+    if use_hash_db:
+        try:
+            save_hash_db(hash_db)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[{command}] hash database not saved ({hash_db}): {e}")
+
+    counts = Counter(rec["action"] if rec is not None else "skipped" for rec in results)
+    stats = {
+        "moved": counts["moved"],
+        "renamed": counts["renamed"],
+        "skipped": counts["skipped"],
+        "duplicates": counts["duplicate"]
+    }
+    return [r for r in results if r is not None], stats
+
+def _prepare_plan(args, cfg, scan_root: Path, dst_root: Path, logger, prefix: str = "") -> List[Dict[str, Any]]:
+    """Shared pipeline of preview, run and merge: discover → filter → plan → collision and dedupe policies.
+
+    Args:
+        args: Namespace from CLI: only_ext, size_min/size_max, by_date, categories, collision and dedupe.
+        cfg (dict): Configuration (behavior.followSymlinks, categories).
+        scan_root (Path): Folder whose files are planned.
+        dst_root (Path): Root where the category folders are created.
+        logger: Logger for console outputs.
+        prefix (str, optional): Prefix of the log messages (e.g. "[merge] "). Defaults to "".
+
+    Raises:
+        ValueError: If the size filters are invalid (propagated from iter_filter_files).
+
+    Returns:
+        List[Dict[str, Any]]: Plan with policies applied.
+    """
+    follow_symlinks = bool(cfg.get("behavior", {}).get("followSymlinks", False))
+    files = list(iter_filter_files(
+        iter_discover_file_infos(scan_root, recursive=False, follow_symlinks=follow_symlinks),
+        only_ext=args.only_ext,
+        size_min=args.size_min,
+        size_max=args.size_max,
+    ))
+    logger.info(f"{prefix}{len(files)} files after filters in {scan_root}")
+
+    # Planning and the collision policy stream entry by entry; dedupe materializes the plan once.
+    plan = iter_build_plan(files, cfg, dst_root, by_date=args.by_date, categories=parse_categories(args.categories))
+    plan = iter_apply_collision_policy(plan, policy=args.collision)
+    return apply_dedupe_policy(plan, policy=args.dedupe)
+
+def cmd_preview(args, logger, cfg) -> None:
+    """Shows the plan that `run` would apply on the folder, without moving anything."""
+    dst_root = Path(args.path) if args.path else Path.cwd()
+    plan = _prepare_plan(args, cfg, dst_root, dst_root, logger)
+    render_plan(plan, logger, max_rows=getattr(args, "max_rows", 50))
+
 def cmd_run(args, logger, cfg) -> None:
     """Executes the organization: Discovers, filters, plans and applies the moves. 
     
@@ -109,6 +388,7 @@ def cmd_run(args, logger, cfg) -> None:
             - collision ("rename" | "keep-newest" | "skip")
             - dedupe ("skip" | "link" | "delete")
             - history (alternative path for history.json)
+            - workers (threads used to apply the plan)
         logger: Logger for console outputs. 
         cfg (dict): Configuration.
         
@@ -119,32 +399,13 @@ def cmd_run(args, logger, cfg) -> None:
             - metadata (`timestamp`, `command`, `source_dir`, `dest_dir`)
     """
     dst_root = Path(args.path) if args.path else Path.cwd()
-    follow_symlinks = bool(cfg.get("behavior", {}).get("followSymlinks", False))
     history_path = resolve_history_path(getattr(args, "history", None))
     logger.info(f"History path (run): {history_path}")
     
     plan = [] 
     
     try: 
-        files = discover_files(dst_root, recursive=False, follow_symlinks=follow_symlinks)
-        logger.info(f"{len(files)} files found: {dst_root}")
-
-        files = filter_files(
-            files,
-            only_ext=args.only_ext,
-            size_min=args.size_min,
-            size_max=args.size_max,
-        )
-        logger.info(f"{len(files)} files after filters")
-
-        plan = build_plan(files, cfg, dst_root, by_date=args.by_date)
-
-        if args.categories:
-            wanted = {c.strip().lower() for c in args.categories.split(",") if c.strip()}
-            plan = [it for it in plan if it.get("category") in wanted]
-    
-        plan = apply_collision_policy(plan, policy=args.collision)   
-        plan = apply_dedupe_policy(plan, policy=args.dedupe)        
+        plan = _prepare_plan(args, cfg, dst_root, dst_root, logger)
     
     except Exception as e: 
         logger.error(f"[run:init] Failed to prepare plan: {e}")
@@ -159,64 +420,22 @@ def cmd_run(args, logger, cfg) -> None:
     if plan:
         logger.debug(f"[run] example plan[0] keys: {sorted(plan[0].keys())}")
     
-    moved = renamed = skipped = duplicates = 0 
-    plan_realizado: list[dict] = []
-    hash_cache: dict[str, str] = {}
-    
-    dedupe_by_hash = (args.dedupe == "skip")
     if args.dedupe in ("link", "delete"):
         logger.warning("Dedupe 'link'/'delete' not implemented in run v1; will be ignored.")
 
-    for idx, step in enumerate(plan):
-        src_str, dest_str = extract_src_dest(step)
-        if not src_str or not dest_str:
-            logger.error(f"[run] item without src/dest (keys={list(step.keys())}): {step}")
-            skipped += 1
-            continue
-
-        src = Path(src_str)
-        dest = Path(dest_str)
-
-        try:
-            action, final_dest = apply_policies_move(
-                src, dest,
-                collision_policy=args.collision,    
-                dedupe_by_hash=dedupe_by_hash,
-                hash_cache=hash_cache,
-                logger=logger
-            )
-        except Exception as e:
-            logger.error(f"[run-error] {src} -> {dest}: {e}")
-            action, final_dest = "skipped", dest
-
-        if action == "moved":
-            moved += 1
-        elif action == "renamed":
-            renamed += 1
-        elif action == "skipped":
-            skipped += 1
-        elif action == "duplicate":
-            duplicates += 1
-        
-        plan_realizado.append({
-            "src": str(src),
-            "dest": str(final_dest),
-            "action": action 
-        })
+    plan_realizado, stats = _run_plan(plan, "run", args, cfg, logger, hash_db=history_path.with_name(HASH_DB_NAME))
+    moved, renamed, skipped, duplicates = stats["moved"], stats["renamed"], stats["skipped"], stats["duplicates"]
     
     batch_id = generate_batch_id()
+    plan_dirs, plan_rows = pack_plan(plan_realizado)
     record = {
-        "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
         "command": "run",
         "source_dir": str(dst_root),
         "dest_dir": str(dst_root), 
-        "plan": plan_realizado,
-        "stats": {
-            "moved": moved,
-            "renamed": renamed,
-            "skipped": skipped,
-            "duplicates": duplicates
-        }
+        "plan_dirs": plan_dirs,
+        "plan": plan_rows,
+        "stats": stats,
     }
     append_batch(history_path, batch_id, record)
     
@@ -249,7 +468,7 @@ def cmd_undo(args, logger, cfg) -> None:
         print("No batches to undo.")
         return
     
-    hist = load_history(history_path)
+    hist = get_history(history_path)
     batches = hist.get("batches") or []
     ids = [b.get("batch_id") for b in batches if isinstance(b, dict)]
     logger.debug(f"[undo] batches found: {len(batches)}; last IDs: {ids[-5:]}")
@@ -261,9 +480,9 @@ def cmd_undo(args, logger, cfg) -> None:
         print(f"Error: The record of batch_id: {last_id}. Not found.")
         return
 
-    plan = rec.get("plan", [])
+    plan = expand_plan(rec)
 
-    if not isinstance(plan, list) or not plan:
+    if not plan:
         logger.info(f"Batch {last_id} has no plan for undo.")
         print(f"Batch {last_id} has no plan for undo; not possible to undo.")
         return
@@ -275,7 +494,11 @@ def cmd_undo(args, logger, cfg) -> None:
             print("Operation canceled.")
             return
         
-    restored = renamed = missing = skipped = 0
+    counts: Counter = Counter()
+    listings = _list_parents([
+        step["src"] for step in plan
+        if isinstance(step, dict) and step.get("action") in ("moved", "renamed") and isinstance(step.get("src"), str)
+    ])
     
     for step in reversed(plan):
         action = step.get("action")
@@ -286,20 +509,14 @@ def cmd_undo(args, logger, cfg) -> None:
         dest = step.get("dest")
         
         if not src or not dest: 
-            logger.warning(f"[undo-invalid-step] {step}")
-            skipped += 1
+            logger.warning("[undo-invalid-step] %s", step)
+            counts["skipped"] += 1
             continue
         
-        result = undo_move_one(dest, src, logger)
-        if result == "restored":
-            restored += 1
-        elif result == "renamed-dest":
-            renamed += 1
-        elif result == "missing":
-            missing += 1
-        else:
-            skipped += 1
+        counts[undo_move_one(dest, src, logger, listings.get(os.path.dirname(src)))] += 1
     
+    restored, renamed, missing = counts["restored"], counts["renamed-dest"], counts["missing"]
+    skipped = sum(counts.values()) - restored - renamed - missing
     
     logger.info(f"[undo] batch-id: {last_id} -> restored: {restored} renamed: {renamed} missing: {missing} skipped: {skipped}")
     print(f"[undo] batch_id: {last_id}")
@@ -330,6 +547,7 @@ Args:
         - dedupe (str): "skip" | "link" | "delete".
         - history (str|None): path to `history.json`.
         - yes (bool): if True, does not ask for interactive confirmation.
+        - workers (int|None): threads used to apply the plan.
     logger: Logger configured to record progress and results.
     cfg (dict): Configuration.
 
@@ -351,22 +569,9 @@ Returns:
     
     history_path = resolve_history_path(getattr(args, "history", None))
     logger.info(f"History Path: {history_path}")
-    follow_symlinks = bool(cfg.get("behavior", {}).get("followSymlinks", False))
     
     try: 
-        files = discover_files(src_root, recursive=False, follow_symlinks=follow_symlinks)
-        logger.info(f"[merge] {len(files)} files detected in src={src_root}")
-        files = filter_files(files, only_ext=args.only_ext, size_min=args.size_min, size_max=args.size_max,)
-        logger.info(f"[merge] {len(files)} files after filters.")
-        
-        plan = build_plan(files, cfg, dst_root, by_date=args.by_date)
-        
-        if args.categories:
-            wanted = {c.strip().lower() for c in args.categories.split(",") if c.strip()}
-            plan = [it for it in plan if it.get("category") in wanted]
-            
-        plan = apply_collision_policy(plan, policy=args.collision)
-        plan = apply_dedupe_policy(plan, policy=args.dedupe)
+        plan = _prepare_plan(args, cfg, src_root, dst_root, logger, prefix="[merge] ")
         
     except Exception as e:
         logger.error(f"[merge:int] Error preparing the plan: {e}")
@@ -386,64 +591,22 @@ Returns:
             print("Operation canceled.")
             return
         
-    moved = renamed = skipped = duplicates = 0
-    
-    plan_realizado: list[dict] = []
-    hash_cache: dict[str, str] = {}
-    dedupe_by_hash = (args.dedupe == "skip")
     if args.dedupe in ("link", "delete"):
         logger.warning("Dedupe link'/'delete' not implemented in merge.")
         
-    for step in plan:
-        src_str, dest_str = extract_src_dest(step)
-        if not src_str or not dest_str:
-            logger.error(f"[merge] item in src/dest (keys={list(step.keys())}): {step}")
-            skipped += 1
-            continue
-        
-        src = Path(src_str)
-        dest = Path(dest_str)
-        
-        try:
-            action, final_dest = apply_policies_move(
-                src, dest,
-                collision_policy=args.collision,
-                dedupe_by_hash=dedupe_by_hash,
-                hash_cache=hash_cache,
-                logger=logger
-            )
-        except Exception as e: 
-            logger.error(f"[merge-error] {src} -> {dest}: {e}")
-            action, final_dest = "skipped", dest
-        
-        if action == "moved":
-            moved += 1
-        elif action == "renamed":
-            renamed += 1
-        elif action == "skipped":
-            skipped += 1
-        elif action == "duplicate":
-            duplicates += 1
-            
-        plan_realizado.append({
-            "src": str(src),
-            "dest": str(final_dest),
-            "action": action
-        })
+    plan_realizado, stats = _run_plan(plan, "merge", args, cfg, logger, hash_db=history_path.with_name(HASH_DB_NAME))
+    moved, renamed, skipped, duplicates = stats["moved"], stats["renamed"], stats["skipped"], stats["duplicates"]
         
     batch_id = generate_batch_id()
+    plan_dirs, plan_rows = pack_plan(plan_realizado)
     record = {
-        "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
         "command": "merge",
         "source_dir": str(src_root),
         "dest_dir": str(dst_root),
-        "plan": plan_realizado,
-        "stats": {
-            "moved": moved,
-            "renamed": renamed,
-            "skipped": skipped,
-            "duplicates": duplicates
-        }
+        "plan_dirs": plan_dirs,
+        "plan": plan_rows,
+        "stats": stats,
     }
     append_batch(history_path, batch_id, record)
     
@@ -452,6 +615,20 @@ Returns:
     print(f"[merge] OK - batch_id: {batch_id}")
     print(f"Stats -> moved: {moved} renamed: {renamed} skipped: {skipped} duplicates:{ duplicates}")
 
+def cmd_validate_config(args, logger, cfg) -> None:
+    """Logs the categories of the loaded configuration (load_config already validated it)."""
+    cats = cfg.get("categories", {})
+    logger.info(f"Available categories ({len(cats)}): {', '.join(sorted(cats.keys()))}")
+
+# Subcommand name → handler(args, logger, cfg).
+DISPATCH = {
+    "preview": cmd_preview,
+    "run": cmd_run,
+    "undo": cmd_undo,
+    "merge": cmd_merge,
+    "validate-config": cmd_validate_config,
+}
+
 def main(argv: Optional[List[str]] = None) -> None:
     """Entry point of the CLI with all its components: logger, parser, config and dispatcher.
     
@@ -470,7 +647,7 @@ def main(argv: Optional[List[str]] = None) -> None:
     logs_dir = Path(__file__).parent / "logs"
     logger = setup_logger(logs_dir)
 
-    parser = build_cli_parser()
+    parser = build_cli_parser(argv)
     args = parser.parse_args(argv)
 
     if getattr(args, "debug", False):
@@ -483,48 +660,11 @@ def main(argv: Optional[List[str]] = None) -> None:
     cfg = load_config(cfg_path)
     logger.info(f"Config path: {cfg_path}")
 
-    if args.command == "preview":
-        dst_root = Path(args.path) if args.path else Path.cwd()
-        follow_symlinks = bool(cfg.get("behavior", {}).get("followSymlinks", False))
-
-        files = discover_files(dst_root, recursive=False, follow_symlinks=follow_symlinks)
-        logger.info(f"{len(files)} files found in {dst_root}")
-
-        files = filter_files(
-            files,
-            only_ext=args.only_ext,
-            size_min=args.size_min,
-            size_max=args.size_max,
-        )
-        logger.info(f"{len(files)} files after filters")
-
-        plan = build_plan(files, cfg, dst_root, by_date=args.by_date)
-
-        if args.categories:
-            wanted: Set[str] = {c.strip().lower() for c in args.categories.split(",") if c.strip()}
-            plan = [it for it in plan if it.get("category") in wanted]
-
-        plan = apply_collision_policy(plan, policy=args.collision)
-
-        plan = apply_dedupe_policy(plan, policy=args.dedupe)
-
-        render_plan(plan, logger, max_rows=getattr(args, "max_rows", 50) if hasattr(args, "max_rows") else 50)
-
-    elif args.command == "run":
-        cmd_run(args, logger, cfg)
-
-    elif args.command == "undo":
-        cmd_undo(args, logger, cfg)
-
-    elif args.command == "merge":
-        cmd_merge(args, logger, cfg)
-
-    elif args.command == "validate-config":
-        cats = cfg.get("categories", {})
-        logger.info(f"Available categories ({len(cats)}): {', '.join(sorted(cats.keys()))}")
-
-    else:
+    handler = DISPATCH.get(args.command)
+    if handler is None:
         logger.error("Unrecognized command.")
+        return
+    handler(args, logger, cfg)
 
 if __name__ == "__main__":
     main()
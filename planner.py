@@ -2,13 +2,137 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 import hashlib
+import mmap
+import os
 import re
+import stat
+import time
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Union, Set, Tuple
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Union, Set, Tuple
+
+from .config_loader import _build_ext_index
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+_HASH_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_HAS_FILE_DIGEST = hasattr(hashlib, "file_digest")
+_QUICK_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_NONBLOCK", 0)
+# Digests of quick_hash/full_hash are tagged with the algorithm when it is not the default BLAKE2b.
+_HASH_TAG = "blake3:" if blake3 is not None else ""
+_FULL_HASH_MMAP_MIN = 8 * 1024 * 1024
+_WS_RE = re.compile(r"\s+")
+_SIZE_RE = re.compile(r"([0-9]*\.?[0-9]+)([a-z]*)")
+_INCR_RE = re.compile(r"^(?P<base>.*?)(?:\s\((?P<num>\d+)\))?$")
+
+def _ext_of(name: str) -> str:
+    """Lowercase extension of a file name without the dot; same result as Path(name).suffix.lower().lstrip(".").
+
+    Names that start or end with the only dot (".bashrc", "file.") have no extension.
+    """
+    dot = name.rfind(".")
+    if 0 < dot < len(name) - 1:
+        return name[dot + 1:].lower()
+    return ""
+
+def _path_sort_key(p: Union[Path, os.DirEntry, str]) -> str:
+    """Case-insensitive sort key of a path (sorted computes it once per element)."""
+    return os.fspath(p).lower()
+
+def _scandir_files(root: str, recursive: bool, follow_symlinks: bool) -> Iterator[os.DirEntry]:
+    """Yields the os.DirEntry of every file under root (unsorted).
+
+    The entries keep the type (and, after a first call, the stat) read with the directory, so
+    callers can use them without extra syscalls. Symlinked directories are not entered, and
+    directories that cannot be read are skipped.
+    """
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=follow_symlinks):
+                            yield entry
+                        elif recursive and entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+@dataclass(slots=True)
+class FileInfo:
+    """A discovered file with the stat fields used by the planner, read once during the scan.
+
+    Attributes:
+        path (Path): Path of the file.
+        size (int): Size in bytes.
+        mtime (float): Modification time (st_mtime).
+        ctime (float): st_ctime, used as "created" by by_date.
+        ext (str): Extension in lowercase, without the leading dot ("" if there is none).
+    """
+    path: Path
+    size: int
+    mtime: float
+    ctime: float
+    ext: str
+
+    def __fspath__(self) -> str:
+        return os.fspath(self.path)
+
+    @classmethod
+    def from_path(cls, path: Union[Path, str], st: Optional[os.stat_result] = None) -> "FileInfo":
+        """Builds a FileInfo from a path, calling stat() unless `st` is given."""
+        path = Path(path)
+        if st is None:
+            st = path.stat()
+        return cls(path, st.st_size, st.st_mtime, st.st_ctime, _ext_of(path.name))
+
+def from_paths(paths: Iterable[Union[Path, str]]) -> Iterator[FileInfo]:
+    """Adapts plain paths to FileInfo (one stat each). Non-regular or unreadable paths are skipped."""
+    for p in paths:
+        try:
+            st = os.stat(p)
+            if stat.S_ISREG(st.st_mode):
+                yield FileInfo.from_path(p, st)
+        except OSError:
+            continue
+
+def iter_discover_file_infos(root: Union[Path, str], recursive: bool = False, follow_symlinks: bool = False) -> Iterator[FileInfo]:
+    """Same as iter_discover_files, but yields FileInfo with the stat taken from the DirEntry.
+
+    iter_filter_files and build_plan read the size, extension and dates from it, so no other
+    stat call is made for the file.
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return
+    for entry in _scandir_files(os.fspath(root), recursive, follow_symlinks):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        yield FileInfo(Path(entry.path), st.st_size, st.st_mtime, st.st_ctime, _ext_of(entry.name))
+
+def iter_discover_files(root: Union[Path, str], recursive: bool = False, follow_symlinks: bool = False) -> Iterator[Path]:
+    """Scans a directory and yields the found files as they are listed (unsorted).
+
+    Same rules as discover_files, without building the list (see _scandir_files).
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return
+    for entry in _scandir_files(os.fspath(root), recursive, follow_symlinks):
+        yield Path(entry.path)
 
 def discover_files(root: Union[Path, str], recursive: bool = False, follow_symlinks: bool = False) -> List[Path]:
     """Scans a directory and returns a list of found files.
@@ -25,34 +149,39 @@ def discover_files(root: Union[Path, str], recursive: bool = False, follow_symli
         - Symlinks to files are included only if `follow_symlinks=True`.
         - Files inaccessible due to permissions or other I/O errors are ignored.
         - Directories are not returned, only file paths.
+        - iter_discover_files yields the same files without sorting or building the list.
     """
     root = Path(root)
-    if not root.exists() or not root.is_dir():
+    if not root.is_dir():
         return []
+    entries = sorted(_scandir_files(os.fspath(root), recursive, follow_symlinks), key=_path_sort_key)
+    return [Path(e.path) for e in entries]
 
-    files: List[Path] = []
-    if recursive:
-        for p in root.rglob("*"):
-            try:
-                if follow_symlinks:
-                    if p.is_file():
-                        files.append(p)
-                else:
-                    if not p.is_symlink() and p.is_file():
-                        files.append(p)
-            except OSError:
-                continue
-    else:
-        try:
-            for p in root.iterdir():
-                try:
-                    if p.is_file() and (follow_symlinks or not p.is_symlink()):
-                        files.append(p)
-                except OSError:
-                    continue
-        except OSError:
-            return []
-    return sorted(files, key=lambda x: str(x).lower())
+def discover_file_infos(root: Union[Path, str], recursive: bool = False, follow_symlinks: bool = False) -> List[FileInfo]:
+    """Same as discover_files, but returns FileInfo (sorted by path) with the stat of the scan.
+
+    Passing the result to filter_files or build_plan avoids a second stat per file.
+    """
+    return sorted(iter_discover_file_infos(root, recursive, follow_symlinks), key=_path_sort_key)
+
+_UNIT_ALIASES = {
+    "b": "b",
+    "k": "kb", "kb": "kb", "kib": "kib",
+    "m": "mb", "mb": "mb", "mib": "mib",
+    "g": "gb", "gb": "gb", "gib": "gib",
+    "t": "tb", "tb": "tb", "tib": "tib",
+}
+_UNIT_FACTORS = {
+    "b": 1,
+    "kb": 1024,
+    "mb": 1024**2,
+    "gb": 1024**3,
+    "tb": 1024**4,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+    "tib": 1024**4,
+}
 
 def parse_size(text: Union[str, int, float]) -> int:
     """Converts a file size value to bytes.
@@ -84,10 +213,15 @@ def parse_size(text: Union[str, int, float]) -> int:
 
     if not isinstance(text, str):
         raise ValueError(f"Invalid size type: {type(text)}")
-    s = re.sub(r"\s+", "", text.strip().lower())
+    return _parse_size_str(text)
+
+@functools.lru_cache(maxsize=128)
+def _parse_size_str(text: str) -> int:
+    """String branch of parse_size, memoized per input text (errors are not cached)."""
+    s = _WS_RE.sub("", text.strip().lower())
     if not s:
         raise ValueError("Invalid size. Empty string.")
-    m = re.fullmatch(r"([0-9]*\.?[0-9]+)([a-z]*)", s)
+    m = _SIZE_RE.fullmatch(s)
     if not m:
         raise ValueError("Invalid size. Unrecognized format.")
     num_str, unit_raw = m.groups()
@@ -99,43 +233,77 @@ def parse_size(text: Union[str, int, float]) -> int:
         raise ValueError(f"Invalid size. Negatives are not allowed: {text!r}")
 
     unit_raw = unit_raw or "b"
-    aliases = {
-        "b": "b",
-        "k": "kb", "kb": "kb", "kib": "kib",
-        "m": "mb", "mb": "mb", "mib": "mib",
-        "g": "gb", "gb": "gb", "gib": "gib",
-        "t": "tb", "tb": "tb", "tib": "tib",
-    }
-    unit = aliases.get(unit_raw)
+    unit = _UNIT_ALIASES.get(unit_raw)
     if unit is None:
         raise ValueError("Invalid unit. Use: B, KB, MB, GB, TB, KiB, MiB, GiB, TiB.")
 
-    factors = {
-        "b": 1,
-        "kb": 1024,
-        "mb": 1024**2,
-        "gb": 1024**3,
-        "tb": 1024**4,
-        "kib": 1024,
-        "mib": 1024**2,
-        "gib": 1024**3,
-        "tib": 1024**4,
-    }
-
-    bytes_value = int(round(v * factors[unit]))
+    bytes_value = int(round(v * _UNIT_FACTORS[unit]))
     return bytes_value
     
-def filter_files(files: Iterable[Path], *, only_ext: Optional[str]=None, size_min: Optional[Union[str, int, float]] = None, size_max: Optional[Union[str, int, float]] = None) -> List[Path]:
+@functools.lru_cache(maxsize=64)
+def _parse_only_ext(only_ext: str) -> Optional[FrozenSet[str]]:
+    """Parses "jpg, .PNG" to the set of allowed extensions, memoized per input text (None if empty)."""
+    parts = [e.strip().lower().lstrip(".") for e in only_ext.split(",")]
+    return frozenset(e for e in parts if e) or None
+
+def iter_filter_files(files: Iterable[Union[Path, FileInfo]], *, only_ext: Optional[str]=None, size_min: Optional[Union[str, int, float]] = None, size_max: Optional[Union[str, int, float]] = None) -> Iterator[Union[Path, FileInfo]]:
+    """Lazy version of filter_files: yields the files that pass all filters in input order.
+
+    The arguments are validated when it is called, not when it is iterated. FileInfo items
+    (see iter_discover_file_infos) are checked with their stored size and extension, without stat.
+
+    Raises:
+        ValueError: If `size_min` > `size_max` or if sizes are not valid
+            (propagated from `parse_size`).
+    """
+    extension_allow = _parse_only_ext(only_ext) if only_ext else None
+
+    min_b: Optional[int] = parse_size(size_min) if size_min is not None else None
+    max_b: Optional[int] = parse_size(size_max) if size_max is not None else None
+    if min_b is not None and max_b is not None and min_b > max_b:
+        raise ValueError(f"Invalid size range: size_min ({min_b}) > size_max ({max_b}).")
+
+    def _gen() -> Iterator[Union[Path, FileInfo]]:
+        for p in files:
+            if isinstance(p, FileInfo):
+                if extension_allow is not None and p.ext not in extension_allow:
+                    continue
+                sz = p.size
+                if (min_b is not None and sz < min_b) or (max_b is not None and sz > max_b):
+                    continue
+                yield p
+                continue
+            try:
+                if extension_allow is not None:
+                    ext = _ext_of(p.name)
+                    if ext not in extension_allow:
+                        continue
+                st = p.stat()
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                sz = int(st.st_size)
+                if (min_b is not None and sz < min_b) or (max_b is not None and sz > max_b):
+                    continue
+                yield p
+            except OSError:
+                continue
+
+    return _gen()
+
+def filter_files(files: Iterable[Union[Path, FileInfo]], *, only_ext: Optional[str]=None, size_min: Optional[Union[str, int, float]] = None, size_max: Optional[Union[str, int, float]] = None, assume_sorted: bool = False) -> List[Union[Path, FileInfo]]:
     """Applies filters to the file list and normalizes.
 
     Args:
-        files (Iterable[Path]): Paths to evaluate. If they are not files they are ignored. 
+        files (Iterable[Path | FileInfo]): Paths to evaluate. If they are not files they are
+            ignored. FileInfo items (see discover_file_infos) use their stored size, without stat. 
         only_ext (str, optional): Allowed extensions, separated by commas. 
         size_min (str | int | float, optional): Minimum file size.
         size_max (str | int | float, optional): Maximum file size.
+        assume_sorted (bool, optional): If True, `files` is already in path order (e.g. the
+            output of discover_files) and the result is not sorted again.
 
     Returns:
-        List[Path]: List of files that pass all filters. 
+        List[Path | FileInfo]: List of files that pass all filters, of the same type as the input. 
     
     Raises:
         ValueError: If `size_min` > `size_max` or if sizes are not valid
@@ -146,34 +314,23 @@ def filter_files(files: Iterable[Path], *, only_ext: Optional[str]=None, size_mi
         - Sizes are interpreted in base 1024.
         - I/O errors (permissions, etc.) are ignored to not interrupt filtering.
     """
-    extension_allow: Optional[Set[str]] = None
-    if only_ext:
-        parts = [e.strip().lower().lstrip(".") for e in only_ext.split(",")]
-        extension_allow = {e for e in parts if e} or None
+    out = iter_filter_files(files, only_ext=only_ext, size_min=size_min, size_max=size_max)
+    if assume_sorted:
+        return list(out)
+    return sorted(out, key=_path_sort_key)
 
-    min_b: Optional[int] = parse_size(size_min) if size_min is not None else None
-    max_b: Optional[int] = parse_size(size_max) if size_max is not None else None
-    if min_b is not None and max_b is not None and min_b > max_b:
-        raise ValueError(f"Invalid size range: size_min ({min_b}) > size_max ({max_b}).")
+def _ext_index(cfg: Dict[str, Any]) -> Dict[str, str]:
+    """Returns the flat extension -> category index of `cfg`, building and storing it if missing.
 
-    out: List[Path] = []
-    for p in files:
-        try:
-            if not p.is_file():
-                continue
-            if extension_allow is not None:
-                ext = p.suffix.lower().lstrip(".")
-                if ext not in extension_allow:
-                    continue
-            st = p.stat()
-            sz = int(st.st_size)
-            if (min_b is not None and sz < min_b) or (max_b is not None and sz > max_b):
-                continue
-            out.append(p)
-        except OSError:
-            continue
-
-    return sorted(out, key=lambda x: str(x).lower())
+    `load_config` already provides it as "_ext2cat"; hand-built configs get it on first use,
+    built by the same config_loader helper.
+    """
+    ext_to_cat = cfg.get("_ext2cat")
+    if ext_to_cat is None:
+        categories = cfg.get("categories", {}) or {}
+        ext_to_cat = _build_ext_index(categories) if isinstance(categories, dict) else {}
+        cfg["_ext2cat"] = ext_to_cat
+    return ext_to_cat
 
 def classify_by_extension(file_path: Path, cfg: Dict[str, Any]) -> Optional[str]:
     """Classifies a file, assigning it a category according to its extension.
@@ -197,54 +354,55 @@ def classify_by_extension(file_path: Path, cfg: Dict[str, Any]) -> Optional[str]
         - It is assumed that `load_config` already normalized extensions (lowercase,
           without dot, without duplicates).
     """
-    ext = file_path.suffix.lower().lstrip(".")
-    categories = cfg.get("categories", {}) or {}
-
-    if isinstance(categories, dict):
-        exts = categories.get  
-        for cat, lst in categories.items():
-            if isinstance(lst, list) and ext in lst:
-                return cat
+    cat = _ext_index(cfg).get(_ext_of(file_path.name))
+    if cat is not None:
+        return cat
 
+    categories = cfg.get("categories", {}) or {}
     behavior = cfg.get("behavior", {}) or {}
     if behavior.get("othersEnabled", True) and "others" in categories:
         return "others"
     return None
 
-def build_plan(files: List[Path], cfg: Dict[str, Any], root: Path, by_date: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Builds the organization plan for the list of files. 
+def iter_build_plan(files: Iterable[Union[Path, FileInfo]], cfg: Dict[str, Any], root: Path, by_date: Optional[str] = None, categories: Optional[FrozenSet[str]] = None, assume_sorted: bool = False) -> Iterator[Dict[str, Any]]:
+    """Yields the organization plan for the list of files, one entry at a time. 
 
     Args:
-        files: List of file paths.
+        files: File paths or FileInfo (any iterable, sorted here unless assume_sorted). The extension and
+            dates of a FileInfo are used as stored.
         cfg: Loaded configuration. 
         root: Root folder where destination folders will be created.
         by_date: None, "created" or "modified" → subfolders YYYY/MM.
+        categories: Categories to keep (see parse_categories). None keeps every category.
+        assume_sorted: If True, `files` is already in path order (e.g. from discover_files or
+            filter_files) and is consumed as it comes, without sorting.
 
-    Returns:
-        List of dicts:
+    Yields:
+        Dicts:
             - src: Original Path
             - dst: Destination Path
             - category: str
             - reason: str
     """
-    plan: List[Dict[str, Any]] = []
-
-    files_sorted = sorted(files, key=lambda p: str(p).lower())
+    files_sorted = files if assume_sorted else sorted(files, key=_path_sort_key)
+    wanted = categories
     categories = cfg.get("categories", {}) or {}
-    ext_to_cat: Dict[str, str] = {}
-    for cat, lst in categories.items():
-        if isinstance(lst, list):
-            for e in lst:
-                if isinstance(e, str) and e:
-                    ext_to_cat[e] = cat
+    ext_to_cat = _ext_index(cfg)
 
     others_enabled = bool((cfg.get("behavior", {}) or {}).get("othersEnabled", True))
     have_others = "others" in categories
 
     by_date = by_date if by_date in (None, "created", "modified") else None
 
-    for file_path in files_sorted:
-        ext = file_path.suffix.lower().lstrip(".")
+    for item in files_sorted:
+        if isinstance(item, FileInfo):
+            info: Optional[FileInfo] = item
+            file_path = item.path
+            ext = item.ext
+        else:
+            info = None
+            file_path = item
+            ext = _ext_of(file_path.name)
         category = ext_to_cat.get(ext)
 
         reason = "match-extension"
@@ -255,28 +413,47 @@ def build_plan(files: List[Path], cfg: Dict[str, Any], root: Path, by_date: Opti
             else:
                 continue
 
+        if wanted is not None and category not in wanted:
+            continue
+
         dest_dir = root / category
 
         if by_date is not None:
             try:
-                st = file_path.stat()
-                ts = st.st_ctime if by_date == "created" else st.st_mtime
-                dt = datetime.fromtimestamp(ts)
-                dest_dir = dest_dir / f"{dt.year:04d}" / f"{dt.month:02d}"
+                if info is not None:
+                    ts = info.ctime if by_date == "created" else info.mtime
+                else:
+                    st = file_path.stat()
+                    ts = st.st_ctime if by_date == "created" else st.st_mtime
+                tm = time.localtime(ts)
+                dest_dir = dest_dir / f"{tm.tm_year:04d}" / f"{tm.tm_mon:02d}"
             except OSError:
                 pass
 
-        dst_path = dest_dir / file_path.name
-        plan.append(
-            {
-                "src": file_path,
-                "dst": dst_path,
-                "category": category,
-                "reason": reason,
-            }
-        )
+        yield {
+            "src": file_path,
+            "dst": dest_dir / file_path.name,
+            "category": category,
+            "reason": reason,
+        }
+
+def build_plan(files: Iterable[Union[Path, FileInfo]], cfg: Dict[str, Any], root: Path, by_date: Optional[str] = None, categories: Optional[FrozenSet[str]] = None, assume_sorted: bool = False) -> List[Dict[str, Any]]:
+    """Builds the organization plan for the list of files (see iter_build_plan).
 
-    return plan
+    Returns:
+        List of dicts with src, dst, category and reason.
+    """
+    return list(iter_build_plan(files, cfg, root, by_date=by_date, categories=categories, assume_sorted=assume_sorted))
+
+def parse_categories(text: Optional[str]) -> Optional[FrozenSet[str]]:
+    """Parses a comma separated list of categories ("media, docs") to a lowercase set.
+
+    Returns:
+        Optional[FrozenSet[str]]: The categories, or None if `text` is empty (no filter).
+    """
+    if not text:
+        return None
+    return frozenset(c.strip().lower() for c in text.split(",") if c.strip())
 
 def next_incremental_name(dst: Path) -> Path: 
     """Generates a non-existing filename with an incremental suffix. 
@@ -292,26 +469,38 @@ def next_incremental_name(dst: Path) -> Path:
     """
     if not dst.exists():
         return dst
+    return _next_free(dst, set(), {})
+
+def _next_free(dst: Path, committed: Set[str], next_n: Dict[Path, int]) -> Path:
+    """Returns the first incremental name of `dst` that is neither on disk nor in `committed`.
 
+    `committed` holds path strings (os.fspath). `next_n` remembers, per collided `dst`, the
+    index to probe next, so repeated collisions on the same name resume where the previous probe
+    stopped instead of re-checking from (2). Candidates are probed as strings; only the chosen
+    one becomes a Path.
+    """
     stem = dst.stem
     suffix = dst.suffix
 
-    m = re.match(r"^(?P<base>.*?)(?:\s\((?P<num>\d+)\))?$", stem)
+    m = _INCR_RE.match(stem)
     if m and m.group("num"):
         base = m.group("base")
         n = int(m.group("num")) + 1
     else:
         base = stem
         n = 2
+    n = next_n.get(dst, n)
+    prefix = os.path.join(os.fspath(dst.parent), base)
 
     while True:
-        candidate = dst.with_name(f"{base} ({n}){suffix}")
-        if not candidate.exists():
-            return candidate
+        candidate = f"{prefix} ({n}){suffix}"
         n += 1
+        if candidate not in committed and not os.path.exists(candidate):
+            next_n[dst] = n
+            return Path(candidate)
 
-def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -> List[Dict[str, Any]]:
-    """Applies the collision policy to all entries of the plan 
+def iter_apply_collision_policy(plan: Iterable[Dict[str, Any]], policy: str = "rename") -> Iterator[Dict[str, Any]]:
+    """Applies the collision policy to the entries of the plan as they arrive.
     
     Gives the option that, when there is a collision it can move, rename or skip. 
         
@@ -320,15 +509,16 @@ def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -
         - keep-newest: In case a file already exists and is newer than src, then skip;
                        If src is newer uses the increment and does not overwrite. 
         - skip: If it exists in destination, skip. 
+    A destination already taken by an earlier entry of the plan counts as a collision too.
     
     Args:
-        plan(List[Dict[str, Any]]): Plan entries. 
+        plan(Iterable[Dict[str, Any]]): Plan entries, e.g. the iter_build_plan stream. 
             - "src" (Path): Source path.
             - "dst" (Path): Destination path.
             - (optional) "notes" (str): previous notes.
     
-    Returns: 
-        List[Dict[str, Any]]: A new list.
+    Yields: 
+        Dict[str, Any]: A new entry per input entry.
             - "decision" (str): "move" or "skip".
             - "dst_final" (Path): final destination decided.
             - "notes" (str, optional): accumulated notes.
@@ -337,7 +527,10 @@ def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -
     if p not in {"rename", "keep-newest", "skip"}:
         p = "rename"
 
-    out: List[Dict[str, Any]] = []
+    # Destinations already claimed by earlier entries, so entries of the plan do not collide
+    # with each other, and the next index to probe per collided name.
+    committed: Set[str] = set()
+    next_n: Dict[Path, int] = {}
 
     for item in plan:
         src: Path = item["src"]
@@ -346,14 +539,20 @@ def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -
         decision = "move"
         dst_final = dst
 
-        collision = dst.exists()
+        dst_str = os.fspath(dst)
+        claimed = dst_str in committed
+        on_disk = not claimed and os.path.exists(dst_str)
+        collision = claimed or on_disk
 
         if p == "rename":
             if collision:
-                dst_final = next_incremental_name(dst)
+                dst_final = _next_free(dst, committed, next_n)
                 note = f"collision: rename -> {dst_final.name}"
         elif p == "keep-newest":
-            if collision:
+            if claimed:
+                dst_final = _next_free(dst, committed, next_n)
+                note = f"collision: keep-newest -> rename to {dst_final.name}"
+            elif on_disk:
                 try:
                     dst_mtime = dst.stat().st_mtime
                     src_mtime = src.stat().st_mtime
@@ -365,12 +564,15 @@ def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -
                         decision = "skip"
                         note = "collision: keep-newest (dst newer or same)"
                     else:
-                        dst_final = next_incremental_name(dst)
+                        dst_final = _next_free(dst, committed, next_n)
                         note = f"collision: keep-newest -> rename to {dst_final.name}"
         elif p == "skip":
             if collision:
                 decision = "skip"
-                note = "collision: skip (dst exists)"
+                note = "collision: skip (dst exists)" if on_disk else "collision: skip (dst taken in plan)"
+
+        if decision == "move":
+            committed.add(os.fspath(dst_final))
 
         new_item = dict(item)
         new_item["decision"] = decision
@@ -378,9 +580,21 @@ def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -
         if note:
             prev = item.get("notes")
             new_item["notes"] = (prev + "; " if prev else "") + note
-        out.append(new_item)
+        yield new_item
 
-    return out
+def apply_collision_policy(plan: List[Dict[str, Any]], policy: str = "rename") -> List[Dict[str, Any]]:
+    """Applies the collision policy to all entries of the plan (see iter_apply_collision_policy).
+
+    Returns:
+        List[Dict[str, Any]]: A new list with "decision", "dst_final" and the accumulated "notes".
+    """
+    return list(iter_apply_collision_policy(plan, policy=policy))
+
+def _hasher():
+    """Returns the hasher of quick_hash/full_hash: BLAKE3 if the optional `blake3` package is installed, BLAKE2b otherwise."""
+    if blake3 is not None:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.blake2b()
 
 def quick_hash(path: Path, *, first_bytes: int = 256 * 1024):
     """Returns a quick signature of the file to be able to detect duplicates.
@@ -390,7 +604,8 @@ def quick_hash(path: Path, *, first_bytes: int = 256 * 1024):
         first_bytes (int, optrional): Number of initial bytes. Must be > 0.
         
     Returns: 
-        Optional: If it could be read returns a tuple. If not returns None.
+        Optional: If it could be read returns a tuple (size, digest, complete), where `complete`
+        tells that the digest covers the whole file (size <= first_bytes). If not returns None.
         
     Raises:
         ValueError: If `first_bytes <= 0`.
@@ -399,17 +614,30 @@ def quick_hash(path: Path, *, first_bytes: int = 256 * 1024):
         raise ValueError("Invalid size, must be > 0.")
 
     try:
-        if not path.is_file():
+        # O_NONBLOCK so a FIFO is never waited on; it is rejected by the fstat check below.
+        fd = os.open(path, _QUICK_OPEN_FLAGS)
+    except OSError:
+        return None
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode):
             return None
-        st = path.stat()
+        h = _hasher()
         size = int(st.st_size)
-        h = hashlib.blake2b()
-        with path.open("rb") as f:
-            chunk = f.read(first_bytes)
+        remaining = min(first_bytes, size)
+        read = 0
+        while remaining > 0:
+            chunk = os.read(fd, remaining)
+            if not chunk:
+                break
             h.update(chunk)
-        return (size, h.hexdigest())
+            read += len(chunk)
+            remaining -= len(chunk)
+        return (size, _HASH_TAG + h.hexdigest(), read == size)
     except OSError:
         return None
+    finally:
+        os.close(fd)
 
 def full_hash(path: Path, chunk_size: int = 1024 * 1024) -> Optional[str]:
     """Calculates the full hash of the file to check if there are duplicates.
@@ -423,6 +651,14 @@ def full_hash(path: Path, chunk_size: int = 1024 * 1024) -> Optional[str]:
     
     Raises:
         ValueError: If `chunk_size <= 0`.
+
+    Notes:
+        - The hash is BLAKE3 when the optional `blake3` package is installed (digest prefixed
+          with "blake3:"), BLAKE2b otherwise.
+        - Files of 8 MiB or more are memory-mapped and hashed in a single update call
+          (BLAKE3's own update_mmap, multithreaded, when available).
+        - Smaller files use hashlib.file_digest (Python 3.11+); `chunk_size` only applies to the
+          read loop used on older versions.
     """
     if chunk_size <= 0:
         raise ValueError("Invalid size, must be > 0.")
@@ -430,21 +666,33 @@ def full_hash(path: Path, chunk_size: int = 1024 * 1024) -> Optional[str]:
     try:
         if not path.is_file():
             return None
-        h = hashlib.blake2b()
+        h = _hasher()
         with path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size >= _FULL_HASH_MMAP_MIN:
+                if hasattr(h, "update_mmap"):
+                    h.update_mmap(os.fspath(path))
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        h.update(mm)
+                return _HASH_TAG + h.hexdigest()
+            if _HAS_FILE_DIGEST:
+                return _HASH_TAG + hashlib.file_digest(f, _hasher).hexdigest()
             while True:
                 b = f.read(chunk_size)
                 if not b:
                     break
                 h.update(b)
-        return h.hexdigest()
+        return _HASH_TAG + h.hexdigest()
     except OSError:
         return None
 
-def apply_dedupe_policy(plan: List[Dict[str, Any]], policy: str = "skip") -> List[Dict[str, Any]]:
+def apply_dedupe_policy(plan: Iterable[Dict[str, Any]], policy: str = "skip") -> List[Dict[str, Any]]:
     """Marks duplicates by content inside the plan and allows deciding its action.
     
-    Uses the functions quick_hash and full_hash to be able to configure duplicates.
+    Uses the functions quick_hash and full_hash to be able to configure duplicates. Both run in
+    a thread pool (the result does not depend on the completion order), and only on files
+    whose size is shared with another entry. full_hash is skipped for files that quick_hash
+    read entirely.
     
     Policy:
         - skip: subsequent ones remain "skip".
@@ -452,7 +700,8 @@ def apply_dedupe_policy(plan: List[Dict[str, Any]], policy: str = "skip") -> Lis
         - delete: (preview) notes and marks skip (does not perform it). 
         
     Args:
-        plan(List[Dict[str, any]]): Plan list.
+        plan(Iterable[Dict[str, any]]): Plan entries (a stream is materialized once here, since
+            duplicates are found across the whole plan).
             - "src" (Path): Source file.
             - "dst" (Path): Destination. 
     
@@ -467,21 +716,43 @@ def apply_dedupe_policy(plan: List[Dict[str, Any]], policy: str = "skip") -> Lis
     if p not in {"skip", "link", "delete"}:
         p = "skip"
 
+    if not isinstance(plan, list):
+        plan = list(plan)
     out: List[Dict[str, Any]] = []
 
-    buckets: Dict[Tuple[int, str], List[int]] = defaultdict(list)
-    for idx, item in enumerate(plan):
-        sig = quick_hash(item["src"])
-        if sig:
-            buckets[sig].append(idx)
+    # Files of different sizes are never duplicates: only sizes shared by 2+ entries get read.
+    srcs = [item["src"] for item in plan]
+    size_groups: Dict[int, List[int]] = defaultdict(list)
+    for idx, src in enumerate(srcs):
+        try:
+            size_groups[os.stat(src).st_size].append(idx)
+        except OSError:
+            pass
+    shared = [i for idxs in size_groups.values() if len(idxs) > 1 for i in idxs]
+
+    # Reads are I/O bound: quick signatures, then the full hashes of every candidate, in a thread pool.
+    buckets: Dict[Tuple[int, str, bool], List[int]] = defaultdict(list)
+    full: Dict[int, Optional[str]] = {}
+    if shared:
+        with ThreadPoolExecutor(max_workers=min(_HASH_WORKERS, len(shared))) as ex:
+            for idx, sig in zip(shared, ex.map(quick_hash, [srcs[i] for i in shared])):
+                if sig:
+                    buckets[sig].append(idx)
+            # A quick signature that covered the whole file is already a full comparison.
+            candidates = [i for sig, idxs in buckets.items() if len(idxs) > 1 and not sig[2] for i in idxs]
+            full = dict(zip(candidates, ex.map(full_hash, [srcs[i] for i in candidates])))
     duplicate_i: Set[int] = set()
     confirmed_groups: List[List[int]] = []
-    for _, idxs in buckets.items():
+    for sig, idxs in buckets.items():
         if len(idxs) < 2:
             continue
+        if sig[2]:
+            confirmed_groups.append(idxs)
+            duplicate_i.update(idxs[1:])
+            continue
         fh_map: Dict[str, List[int]] = defaultdict(list)
         for i in idxs:
-            fh = full_hash(plan[i]["src"])
+            fh = full.get(i)
             if fh:
                 fh_map[fh].append(i)
         for dup_idxs in fh_map.values():
@@ -556,47 +827,56 @@ def render_plan(plan: List[Dict[str, Any]], logger: logging.Logger, max_rows: in
         logger.info("No proposed actions (empty plan).")
         return {"total": 0, "by_category": {}, "by_decision": {}, "shown": 0}
 
-    headers = ["#", "ACTION", "SRC", "→", "DST_FINAL", "CATEGORY", "DECISION", "NOTES"]
-    rows: List[List[str]] = []
-
-    for idx, item in enumerate(plan[:max_rows], start=1):
-        src = str(item.get("src", ""))
-        dst_final = str(item.get("dst_final", item.get("dst", "")))
-        category = str(item.get("category", ""))
-        decision = str(item.get("decision", "move"))
-        notes = str(item.get("notes", ""))
-        action = "MOVE"
-
-        rows.append([str(idx), action, src, "→", dst_final, category, decision, notes])
-
-    widths = [len(h) for h in headers]
-    for r in rows:
-        for i, cell in enumerate(r):
-            widths[i] = max(widths[i], len(cell))
-
-    header_line = "  ".join(h.ljust(widths[i]) for i, h in enumerate(headers))
-    sep_line = "  ".join("-" * widths[i] for i in range(len(headers)))
-    logger.info(header_line)
-    logger.info(sep_line)
-    for r in rows:
-        logger.info("  ".join(r[i].ljust(widths[i]) for i in range(len(headers))))
-
-    shown = len(rows)
-    if total > shown:
-        logger.info(f"... ({total - shown} more not shown; use filters to narrow)")
-
-    cat_counts = Counter(str(it.get("category", "")) for it in plan)
-    dec_counts = Counter(str(it.get("decision", "move")) for it in plan)
-
-    logger.info("Summary by category:")
-    for cat, cnt in sorted(cat_counts.items(), key=lambda x: (-x[1], x[0])):
-        logger.info(f"  {cat}: {cnt}")
-
-    logger.info("Summary by decision:")
-    for dec, cnt in sorted(dec_counts.items(), key=lambda x: (-x[1], x[0])):
-        logger.info(f"  {dec}: {cnt}")
+    shown = min(total, max_rows)
+    cat_counts: Counter[str] = Counter()
+    dec_counts: Counter[str] = Counter()
+    for it in plan:
+        cat_counts[str(it.get("category", ""))] += 1
+        dec_counts[str(it.get("decision", "move"))] += 1
+
+    # The whole block goes out as one record: one handler lock and one write instead of one per line.
+    if logger.isEnabledFor(logging.INFO):
+        headers = ["#", "ACTION", "SRC", "→", "DST_FINAL", "CATEGORY", "DECISION", "NOTES"]
+        rows: List[List[str]] = []
+
+        for idx, item in enumerate(plan[:max_rows], start=1):
+            src = str(item.get("src", ""))
+            dst_final = str(item.get("dst_final", item.get("dst", "")))
+            category = str(item.get("category", ""))
+            decision = str(item.get("decision", "move"))
+            notes = str(item.get("notes", ""))
+            action = "MOVE"
+
+            rows.append([str(idx), action, src, "→", dst_final, category, decision, notes])
+
+        widths = [len(h) for h in headers]
+        for r in rows:
+            for i, cell in enumerate(r):
+                widths[i] = max(widths[i], len(cell))
+
+        # A title first, so the record prefix does not shift the table header.
+        lines: List[str] = [
+            "Proposed plan:",
+            "  ".join(h.ljust(widths[i]) for i, h in enumerate(headers)),
+            "  ".join("-" * widths[i] for i in range(len(headers))),
+        ]
+        for r in rows:
+            lines.append("  ".join(r[i].ljust(widths[i]) for i in range(len(headers))))
+
+        if total > shown:
+            lines.append(f"... ({total - shown} more not shown; use filters to narrow)")
+
+        lines.append("Summary by category:")
+        for cat, cnt in sorted(cat_counts.items(), key=lambda x: (-x[1], x[0])):
+            lines.append(f"  {cat}: {cnt}")
+
+        lines.append("Summary by decision:")
+        for dec, cnt in sorted(dec_counts.items(), key=lambda x: (-x[1], x[0])):
+            lines.append(f"  {dec}: {cnt}")
+
+        lines.append(f"Total proposed actions: {total}")
+        logger.info("\n".join(lines))
 
-    logger.info(f"Total proposed actions: {total}")
     return {
         "total": total,
         "by_category": dict(cat_counts),